@@ -73,11 +73,12 @@ theta2_min, theta2_max = -0.75*math.pi, 0.75*math.pi
 
 
 # ============================= Build model ============================= #
-with gp.Env() as env, gp.Model(env=env) as m:
+def build_arm(m, x_star, y_star, L1=L1, L2=L2, xo=xo, yo=yo, r=r,
+              theta1_limits=(theta1_min, theta1_max), theta2_limits=(theta2_min, theta2_max)):
 
     # Decision variables (angles)
-    theta1 = m.addVar(lb=theta1_min, ub=theta1_max, name="theta1"                )
-    theta2 = m.addVar(lb=theta2_min, ub=theta2_max, name="theta2"                )
+    theta1 = m.addVar(lb=theta1_limits[0], ub=theta1_limits[1], name="theta1"    )
+    theta2 = m.addVar(lb=theta2_limits[0], ub=theta2_limits[1], name="theta2"    )
     x      = m.addVar(lb=0,                         name="x"                     )
     y      = m.addVar(lb=0,                         name="y"                     )
     mx     = m.addVar(lb=0,                         name="mx"                    )
@@ -93,10 +94,12 @@ with gp.Env() as env, gp.Model(env=env) as m:
     m.addConstr( my   == L1*nl.sin(theta1)/2,                                                   name = "x positionn of the middle of the arm"       )
     m.addConstr( dist == nl.sqrt( (x - x_star) * (x - x_star) + (y - y_star) * (y - y_star) ),  name = "Minimize the distance to objective position")
     m.addConstr( R    == nl.sqrt( (mx - xo) * (mx - xo) + (my - yo) * (my - yo) ),              name = "x and y outside of the cone"                )
-
-    m.optimize()
-    show_results()
-
+    return theta1, theta2, x, y, dist
 
 
+if __name__ == "__main__":
+    with gp.Env() as env, gp.Model(env=env) as m:
+        theta1, theta2, x, y, dist = build_arm(m, x_star, y_star)
 
+        m.optimize()
+        show_results()
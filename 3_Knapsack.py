@@ -1,11 +1,13 @@
+import time
 import numpy as np
 import gurobipy as gp
 from gurobipy import GRB
 from gurobipy import tupledict
+from solution import values as solution_values
 
-def generate_knapsack(num_items):
+def generate_knapsack(num_items, seed=0):
     # Fix seed value
-    rng = np.random.default_rng(seed=0)
+    rng = np.random.default_rng(seed=seed)
     # Item values, weights
     values = rng.uniform(low=1, high=25, size=num_items)
     weights = rng.uniform(low=5, high=100, size=num_items)
@@ -15,28 +17,206 @@ def generate_knapsack(num_items):
     return values, weights, capacity
 
 
-def solve_knapsack_model(values, weights, capacity):
+def build_knapsack_dict(model, values, weights, capacity):
     num_items = len(values)
     # Turn values and weights numpy arrays to dict
     # ...
 
     index, values, weights = gp.multidict({i : (values[i] , weights[i]) for i in range(num_items)})
 
-    with gp.Env() as env, gp.Model(name="knapsack", env=env) as model:
-        x = model.addVars(index, vtype = GRB.BINARY, name="x") 
+    x = model.addVars(index, vtype = GRB.BINARY, name="x") 
+
+    model.setObjective(x.prod(values), GRB.MAXIMIZE)
+    
+    model.addConstr(x.prod(weights) <= capacity, name="capacity")
+    return x
+
+
+def build_knapsack_matrix(model, values, weights, capacity):
+    # Same model straight from the NumPy arrays
+    x = model.addMVar(len(values), vtype = GRB.BINARY, name="x")
 
-        model.setObjective(x.prod(values), GRB.MAXIMIZE)
-        
-        model.addConstr(x.prod(weights) <= capacity, name="capacity")
+    model.setObjective(values @ x, GRB.MAXIMIZE)
+
+    model.addConstr(weights @ x <= capacity, name="capacity")
+    return x
+
+
+def solve_knapsack_model(values, weights, capacity, build=build_knapsack_matrix):
+    with gp.Env() as env, gp.Model(name="knapsack", env=env) as model:
+        x = build(model, values, weights, capacity)
 
         model.optimize()
         if model.status == GRB.OPTIMAL:
-            chosen = [i for i in index if x[i].X > 0.5]
+            # MVar or tupledict, one attribute call (solution.py)
+            chosen = np.flatnonzero(solution_values(model, x) > 0.5).tolist()
             total_value = model.ObjVal
-            total_weight = sum(weights[i] for i in chosen)
+            total_weight = np.asarray(weights)[chosen].sum()
             print(f"Optimal value = {total_value:.2f}")
             print(f"Total weight  = {total_weight:.2f} / Capacity {capacity:.2f}")
             print(f"Items chosen (first 10): {chosen[:10]}")
+            return total_value, chosen
+
+
+# ============================= Core reduction ============================= #
+# Items sorted by decreasing value/weight ratio. The LP relaxation takes them in
+# this order up to the break item b, which is taken fractionally:
+#     U = sum(values[:b]) + r_b * (capacity - sum(weights[:b])),   r_b = values[b] / weights[b]
+# Changing item j from its LP value costs at least |values[j] - r_b * weights[j]|
+# (Dembo & Hammer bound). If U minus this cost is not above a feasible value G,
+# item j is fixed to its LP value. Only the remaining "core" items, which are
+# close to the break item, are solved exactly.
+
+def _break_item(values, weights, capacity):
+    order = np.argsort(-values / weights, kind="stable")
+    v, w  = values[order], weights[order]
+    cum_w = np.cumsum(w)
+    b     = int(np.searchsorted(cum_w, capacity, side="right"))
+    return order, v, w, b
+
+
+def _core_dp(v, w, capacity, b, tol=1e-9):
+    """
+    Exact solution of the sorted knapsack (v, w) by dynamic programming around
+    the break item b. The states are the non-dominated (weight, value) pairs of
+    the solutions derived from the break solution (items [0, b) taken) by
+    removing items before b and adding items from b, the core growing by one
+    item on each side at each step. States whose LP bound cannot beat the best
+    feasible value are dropped, and the expansion stops when no state is left
+    that could improve it. Return the set of taken positions.
+    """
+    n = len(v)
+    W = np.array([w[:b].sum()])
+    V = np.array([v[:b].sum()])
+    best = V[0]
+    if b == n:
+        return np.arange(n)
+    r     = v / w
+    upper = V[0] + r[b] * (capacity - W[0])
+    slack = upper - np.abs(v - r[b] * w)  # Dembo & Hammer bound of each item
+
+    history = []  # (position, changed, parent) per processed item
+    s, t = b - 1, b
+    while s >= 0 or t < n:
+        # Next item on each side whose Dembo & Hammer bound can still beat `best`
+        while s >= 0 and slack[s] <= best + tol:
+            s -= 1
+        while t < n and slack[t] <= best + tol:
+            t += 1
+        r_add = r[t] if t < n else 0.0
+        r_rem = r[s] if s >= 0 else np.inf
+        feasible = W <= capacity
+        # Each branch on its own states: (W - capacity) * inf is NaN when W == capacity
+        bound = np.empty_like(V)
+        bound[feasible]  = V[feasible]  + (capacity - W[feasible])  * r_add
+        bound[~feasible] = V[~feasible] - (W[~feasible] - capacity) * r_rem
+        promising = bound > best + tol
+        if not promising.any() or (s < 0 and t >= n):
+            break
+        # Keep the best feasible state, to backtrack the solution from it
+        promising[np.flatnonzero(feasible)[np.argmax(V[feasible])]] = True
+        W, V = W[promising], V[promising]
+        parent_ids = np.flatnonzero(promising)
+
+        # Alternate between adding the next item after b and removing the next one before b
+        if t < n and (s < 0 or len(history) % 2 == 0):
+            pos, sign = t, 1.0
+            t += 1
+        else:
+            pos, sign = s, -1.0
+            s -= 1
+        W_all   = np.concatenate((W, W + sign * w[pos]))
+        V_all   = np.concatenate((V, V + sign * v[pos]))
+        changed = np.repeat((False, True), len(W))
+        parent  = np.tile(parent_ids, 2)
+
+        # Sort by weight (ties: best value first), keep the strictly increasing values
+        idx = np.lexsort((-V_all, W_all))
+        V_sorted = V_all[idx]
+        idx = idx[V_sorted > np.maximum.accumulate(np.concatenate(([-np.inf], V_sorted[:-1])))]
+        W, V = W_all[idx], V_all[idx]
+        history.append((pos, changed[idx], parent[idx]))
+        feasible = W <= capacity
+        if feasible.any():
+            best = max(best, V[feasible].max())
+
+    # Backtrack from the best feasible state
+    taken = np.zeros(n, bool)
+    taken[:b] = True
+    k = np.flatnonzero(W <= capacity)[np.argmax(V[W <= capacity])]
+    for pos, changed, parent in reversed(history):
+        if changed[k]:
+            taken[pos] = not taken[pos]
+        k = parent[k]
+    return np.flatnonzero(taken)
+
+
+def _core_mip(v, w, capacity, b, core_size=50, tol=1e-9):
+    """
+    Same as `_core_dp`, the core being a window of `core_size` items on each side
+    of the break item solved with Gurobi, the items before it fixed to 1 and
+    after it to 0. The window doubles until every item outside of it is fixed
+    by the Dembo & Hammer bound, which proves the window solution optimal.
+    The window solution is checked against the exact capacity, Gurobi only
+    meeting it up to its tolerances; `_core_dp` takes over if it is violated.
+    Near-ties of the ratios make each window solve a large branch-and-bound
+    (seconds to tens of seconds at 10^6 items): this is the cross-check of
+    `_core_dp`, not the fast path.
+    """
+    n = len(v)
+    if b == n:
+        return np.arange(n)
+    r     = v / w
+    upper = v[:b].sum() + r[b] * (capacity - w[:b].sum())
+    slack = upper - np.abs(v - r[b] * w)
+    params = {"OutputFlag": 0, "MIPGap": 0, "IntFeasTol": 1e-9, "FeasibilityTol": 1e-9}
+    with gp.Env(params=params) as env:
+        while True:
+            lo, hi = max(0, b - core_size), min(n, b + core_size)
+            with gp.Model(name="knapsack_core", env=env) as model:
+                x = model.addMVar(hi - lo, vtype=GRB.BINARY, name="x")
+                model.setObjective(v[lo:hi] @ x, GRB.MAXIMIZE)
+                model.addConstr(w[lo:hi] @ x <= capacity - w[:lo].sum(), name="capacity")
+                model.optimize()
+                taken = np.concatenate((np.arange(lo), lo + np.flatnonzero(x.X > 0.5)))
+            # Value and weight of the rounded selection, not the ones of Gurobi
+            if w[taken].sum() > capacity:
+                return _core_dp(v, w, capacity, b)
+            best = v[taken].sum()
+            if (lo == 0 or slack[:lo].max() <= best + tol) and (hi == n or slack[hi:].max() <= best + tol):
+                return taken
+            core_size *= 2
+
+
+def solve_knapsack_core(values, weights, capacity, core_solver="dp"):
+    values  = np.asarray(values, dtype=float)
+    weights = np.asarray(weights, dtype=float)
+
+    order, v, w, b = _break_item(values, weights, capacity)
+    if core_solver == "dp":
+        taken = _core_dp(v, w, capacity, b)
+    else:
+        taken = _core_mip(v, w, capacity, b)
+
+    chosen = np.sort(order[taken])
+    total_value = values[chosen].sum()
+    total_weight = weights[chosen].sum()
+    print(f"Optimal value = {total_value:.2f}")
+    print(f"Total weight  = {total_weight:.2f} / Capacity {capacity:.2f}")
+    print(f"Items chosen (first 10): {chosen[:10].tolist()}")
+    return total_value, chosen.tolist()
+
+
+if __name__ == "__main__":
+    data = generate_knapsack(10000)
+    mip_value, _ = solve_knapsack_model(*data)
+    core_value, _ = solve_knapsack_core(*data)
+    # The MIP stops at the default MIPGap, the core engines are exact
+    assert mip_value - 1e-6 <= core_value <= mip_value * (1 + 1e-4) + 1e-6
+    core_mip_value, _ = solve_knapsack_core(*data, core_solver="mip")
+    assert abs(core_mip_value - core_value) <= 1e-9 * core_value
 
-data = generate_knapsack(10000)
-solve_knapsack_model(*data)
\ No newline at end of file
+    data = generate_knapsack(1_000_000)
+    start = time.perf_counter()
+    solve_knapsack_core(*data)
+    print(f"Core engine on 10^6 items: {time.perf_counter() - start:.2f} seconds")
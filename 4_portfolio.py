@@ -1,43 +1,206 @@
-import json
+import argparse
+from concurrent.futures import ProcessPoolExecutor
 import pandas as pd
 import numpy as np
 import gurobipy as gp
 from gurobipy import GRB
+from datastore import load_instance
+from solution import values, extract, write_frames
+from profiler import PhaseProfiler
 
-with open("data/portfolio-example.json", "r") as f:
-    data = json.load(f)
+# ============================= Explications ============================= #
+# Minimum variance portfolio with a target return and at most k assets.
+# The risk x' Σ x can be written in three ways:
+#   - "quicksum": n² scalar terms, gp.quicksum(x[i] * sigma[i,j] * x[j])
+#   - "dense"   : matrix form x @ Σ @ x, one call on NumPy arrays
+#   - "factor"  : Σ = B F B' + D, with k factor variables f = B' x, so that
+#                 x' Σ x = f' F f + x' D x and the Q matrix has n + k² terms only.
+# The factor data are read from the data file ("factor_loadings",
+# "factor_covariance", "specific_variance") when present, otherwise they are
+# estimated from the covariance by a principal component analysis.
 
-n = data["num_assets"]
-sigma = np.array(data["covariance"])
-mu = np.array(data["expected_return"])
-mu_0 = data["target_return"]
-k = data["portfolio_max_size"]
+def load_portfolio(path="data/portfolio-example.json"):
+    # Arrays are memory-mapped from the binary store of the JSON file (see datastore.py)
+    data = load_instance(path)
 
+    n = data["num_assets"]
+    sigma = np.asarray(data["covariance"])
+    mu = np.asarray(data["expected_return"])
+    mu_0 = data["target_return"]
+    k = data["portfolio_max_size"]
+    factors = None
+    if "factor_loadings" in data:
+        factors = (np.asarray(data["factor_loadings"]),
+                   np.asarray(data["factor_covariance"]),
+                   np.asarray(data["specific_variance"]))
+    return n, sigma, mu, mu_0, k, factors
 
-with gp.Env() as env, gp.Model(name="portfolio", env=env) as model:
+
+def generate_portfolio(n, num_factors=10, seed=0):
+    # Random instance with an exact factor structure
+    rng = np.random.default_rng(seed=seed)
+    B = rng.normal(scale=0.02, size=(n, num_factors))
+    F = np.eye(num_factors)
+    D = rng.uniform(low=1e-4, high=1e-3, size=n)
+    sigma = B @ F @ B.T + np.diag(D)
+    mu = rng.uniform(low=0, high=2e-3, size=n)
+    mu_0 = float(np.quantile(mu, 0.75))
+    k = min(n, 15)
+    return n, sigma, mu, mu_0, k, (B, F, D)
+
+
+def estimate_factors(sigma, num_factors):
+    # Σ ≈ B F B' + D with the top eigenvectors, D keeps the diagonal exact
+    eigval, eigvec = np.linalg.eigh(sigma)
+    top = np.argsort(eigval)[::-1][:num_factors]
+    B = eigvec[:, top]
+    F = np.diag(np.clip(eigval[top], 0, None))
+    D = np.clip(np.diag(sigma) - np.einsum("ik,kk,ik->i", B, F, B), 0, None)
+    return B, F, D
+
+
+def build_portfolio(model, n, sigma, mu, mu_0, k, factors=None, risk_model="dense", num_factors=10):
     # Name the modeling objects to retrieve them
-    # ...
-    x = model.addVars(n, ub = 1, lb = 0, vtype = GRB.CONTINUOUS, name="x") 
-    y = model.addVars(n,                 vtype = GRB.BINARY    , name="y") 
-    risk = gp.quicksum(x[i] * sigma[i,j] * x[j] for i in range(n) for j in range(n))
+    if risk_model == "quicksum":
+        x = model.addVars(n, ub = 1, lb = 0, vtype = GRB.CONTINUOUS, name="x")
+        y = model.addVars(n,                 vtype = GRB.BINARY    , name="y")
+        risk = gp.quicksum(x[i] * sigma[i,j] * x[j] for i in range(n) for j in range(n))
+        expected_return = gp.quicksum(x[i] * mu[i] for i in range(n))
+        model.addConstrs((x[i] <= y[i] for i in range(n))                ,name="is_used")
+    else:
+        x = model.addMVar(n, ub = 1, lb = 0, vtype = GRB.CONTINUOUS, name="x")
+        y = model.addMVar(n,                 vtype = GRB.BINARY    , name="y")
+        if risk_model == "dense":
+            risk = x @ sigma @ x
+        elif risk_model == "factor":
+            B, F, D = factors if factors is not None else estimate_factors(sigma, num_factors)
+            f = model.addMVar(B.shape[1], lb = -GRB.INFINITY, name="f")
+            model.addConstr(f == B.T @ x                                 ,name="factor")
+            risk = f @ F @ f + (D * x) @ x
+        else:
+            raise ValueError(f"Unknown risk model: {risk_model}")
+        expected_return = mu @ x
+        model.addConstr(x <= y                                           ,name="is_used")
 
     model.setObjective(risk)
 
-    expected_return = gp.quicksum(x[i] * mu[i] for i in range(n)) 
     model.addConstr(expected_return >= mu_0                          ,name="return")
     model.addConstr(x.sum()                                     == 1 ,name="fraction")
     model.addConstr(y.sum()                                     <= k ,name="number")
-    model.addConstrs((x[i] <= y[i] for i in range(n))                ,name="is_used")
-
-    model.optimize()
-
-    # Write the solution into a DataFrame
-    portfolio = [var.X for var in model.getVars() if "x" in var.VarName]
-    risk = model.ObjVal
-    expected_return = model.getRow(model.getConstrByName("return")).getValue()
-    df = pd.DataFrame(
-        data=portfolio + [risk, expected_return],
-        index=[f"asset_{i}" for i in range(n)] + ["risk", "return"],
-        columns=["Portfolio"],
-    )
-    print(df)
\ No newline at end of file
+    return x, y
+
+
+def portfolio_values(model, x):
+    # MVar or tupledict, one attribute call (solution.py)
+    return values(model, x)
+
+
+def set_start(model, var, values):
+    if isinstance(var, gp.MVar):
+        var.Start = values
+    else:
+        model.setAttr("Start", list(var.values()), list(values))
+
+
+# ============================= Efficient frontier ============================= #
+# The model is built once per worker and only the RHS of the "return" constraint
+# changes along the grid of targets. The grid of a worker is walked from the
+# highest target down: the solution of the previous (neighbouring) target then
+# meets the lower return too, and is a feasible start for the next solve.
+
+def _frontier_chunk(job):
+    data, targets, risk_model, num_factors, threads = job
+    rows = []
+    with gp.Env(params={"OutputFlag": 0, "Threads": threads}) as env, gp.Model(name="frontier", env=env) as model:
+        x, y = build_portfolio(model, *data, risk_model=risk_model, num_factors=num_factors)
+        model.update()
+        target = model.getConstrByName("return")
+        for mu_0 in targets[::-1]:
+            target.RHS = mu_0
+            model.optimize()
+            if model.SolCount == 0:
+                rows.append((mu_0, model.Status, np.nan, None))
+                continue
+            weights = portfolio_values(model, x)
+            rows.append((mu_0, model.Status, model.ObjVal, weights))
+            # Warm start of the next target
+            set_start(model, x, weights)
+            set_start(model, y, portfolio_values(model, y).round())
+    return rows[::-1]
+
+
+def efficient_frontier(data, targets, risk_model="dense", num_factors=10, workers=1):
+    """
+    Minimum risk for every target return of `targets`. The sorted grid is cut
+    into `workers` contiguous chunks, each solved in its own process and Env.
+    Return a DataFrame indexed by mu_0 with the risk and the asset weights.
+    """
+    n = data[0]
+    targets = np.sort(np.asarray(targets, dtype=float))
+    chunks  = [c for c in np.array_split(targets, workers) if len(c)]
+    jobs    = [(data, c, risk_model, num_factors, 1 if workers > 1 else 0) for c in chunks]
+    if workers > 1:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            results = list(pool.map(_frontier_chunk, jobs))
+    else:
+        results = [_frontier_chunk(job) for job in jobs]
+
+    rows = [row for chunk in results for row in chunk]
+    weights = np.array([w if w is not None else np.full(n, np.nan) for *_, w in rows])
+    df = pd.DataFrame(weights, columns=[f"asset_{i}" for i in range(n)])
+    df.insert(0, "risk", [risk for _, _, risk, _ in rows])
+    df.insert(1, "status", [status for _, status, _, _ in rows])
+    df.index = pd.Index([mu_0 for mu_0, *_ in rows], name="mu_0")
+    return df
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Minimum variance portfolio")
+    parser.add_argument("--data", default="data/portfolio-example.json")
+    parser.add_argument("--risk-model", default="dense", choices=["quicksum", "dense", "factor"])
+    parser.add_argument("--factors", type=int, default=10, help="factors estimated when the file has none")
+    parser.add_argument("--frontier", type=int, default=0, help="number of targets of the efficient frontier")
+    parser.add_argument("--workers", type=int, default=1, help="processes for the frontier")
+    parser.add_argument("-o", "--output", help="CSV file for the frontier")
+    parser.add_argument("--solution", help="directory (CSV per variable group) or .npz file for the solution")
+    parser.add_argument("--profile", nargs="?", const="-", metavar="JSON",
+                        help="time and memory of each phase, as a table or appended to a JSON lines file")
+    args = parser.parse_args()
+
+    profiler = PhaseProfiler(enabled=args.profile is not None, path=None if args.profile == "-" else args.profile)
+    with profiler.phase("load"):
+        n, sigma, mu, mu_0, k, factors = data = load_portfolio(args.data)
+
+    if args.frontier:
+        # From the least to the most profitable asset
+        # With --workers > 1 the CPU time and memory of the worker processes are not counted
+        with profiler.phase("frontier"):
+            frontier = efficient_frontier(data, np.linspace(mu.min(), mu.max(), args.frontier),
+                                          risk_model=args.risk_model, num_factors=args.factors,
+                                          workers=args.workers)
+        with profiler.phase("results"):
+            print(frontier[["risk"]])
+            if args.output:
+                frontier.to_csv(args.output)
+    else:
+        with gp.Env() as env, gp.Model(name="portfolio", env=env) as model:
+            with profiler.phase("build", model):
+                x, y = build_portfolio(model, *data, risk_model=args.risk_model, num_factors=args.factors)
+
+            with profiler.phase("optimize", model):
+                model.optimize()
+
+            with profiler.phase("results"):
+                # Write the solution into a DataFrame
+                portfolio = portfolio_values(model, x).tolist()
+                risk = model.ObjVal
+                expected_return = model.getRow(model.getConstrByName("return")).getValue()
+                df = pd.DataFrame(
+                    data=portfolio + [risk, expected_return],
+                    index=[f"asset_{i}" for i in range(n)] + ["risk", "return"],
+                    columns=["Portfolio"],
+                )
+                print(df)
+                if args.solution:
+                    write_frames(extract(model, {"x": x, "y": y}), args.solution)
+    profiler.report(script="4_portfolio", data=args.data, risk_model=args.risk_model, frontier=args.frontier)
@@ -1,49 +1,238 @@
-import json
+import argparse
+import numpy as np
 import gurobipy as gp
+from functools import partial
 from gurobipy import GRB
-from pathlib import Path
+from datastore import load_instance
+from solution import extract
 
-# ----- Load data from JSON -----
-with open("data/lot_sizing_data.json", "r") as f:
-    data = json.load(f)
+# ----- Load data from JSON (memory-mapped binary store, see datastore.py) -----
+def load_lot_sizing(path="data/lot_sizing_data.json"):
+    data = load_instance(path)
 
-name = data["name"]
-H    = int(data["H"])                               # h  : number of periods t
-d    = [float(val) for val in data["demand"]]       # dt : Demand in period t 
-c    = [float(val) for val in data["var_cost"]]     # ct : Variable production cost (€/unit) 
-f    = [float(val) for val in data["setup_cost"]]   # ft : Fixed setup cost (€/setup) 
-h    = [float(val) for val in data["hold_cost"]]    # ht : Holding cost (€/unit carried to t+1 ) 
-Qmin = float(data["Qmin"])                          # Qmin : Minimum batch size if producing 
-Qmax = float(data["Qmax"])                          # Qmax : Maximum production capacity 
-I0   = float(data["I0"])                            # I0 : Initial inventory
+    name = data["name"]
+    H    = int(data["H"])                                   # h  : number of periods t
+    d    = np.asarray(data["demand"],     dtype=float)      # dt : Demand in period t
+    c    = np.asarray(data["var_cost"],   dtype=float)      # ct : Variable production cost (€/unit)
+    f    = np.asarray(data["setup_cost"], dtype=float)      # ft : Fixed setup cost (€/setup)
+    h    = np.asarray(data["hold_cost"],  dtype=float)      # ht : Holding cost (€/unit carried to t+1 )
+    Qmin = float(data["Qmin"])                              # Qmin : Minimum batch size if producing
+    Qmax = float(data["Qmax"])                              # Qmax : Maximum production capacity
+    I0   = float(data["I0"])                                # I0 : Initial inventory
 
+    # Basic validation
+    assert len(d) == H and len(c) == H and len(f) == H and len(h) == H
+    assert 0 <= Qmin <= Qmax
+    return name, H, d, c, f, h, Qmin, Qmax, I0
 
-# Basic validation
-assert len(d) == H and len(c) == H and len(f) == H and len(h) == H
-assert 0 <= Qmin <= Qmax
 
-# ----- Build model -----
-with gp.Env() as env, gp.Model(name, env=env) as model:
+def generate_lot_sizing(H, seed=0):
+    # Random instance with the same structure as data/lot_sizing_data.json
+    rng = np.random.default_rng(seed=seed)
+    d = rng.integers(low=4, high=12, size=H).astype(float)
+    c = np.full(H, 2.0)
+    f = rng.uniform(low=5, high=15, size=H)
+    h = np.full(H, 0.5)
+    return f"lot-sizing-{H}", H, d, c, f, h, 4.0, 15.0, 0.0
+
 
+# ----- Build model -----
+def build_lot_sizing_model(model, H, d, c, f, h, Qmin, Qmax, I0):
+    # One scalar constraint at a time (3·H calls)
     x = model.addVars(H, lb = 0, vtype = GRB.CONTINUOUS, name="x") # xt : Production quantity in period t
     y = model.addVars(H,         vtype = GRB.BINARY    , name="y") # yt : Binary variable indicating whether production occurs in period t
     i = model.addVars(H, lb = 0, vtype = GRB.CONTINUOUS, name="i") # It : End-of-period inventory after meeting demand dt
 
     model.setObjective(gp.quicksum(c[t]*x[t] + f[t]*y[t] + h[t]*i[t] for t in range(H)))
-    
+
     for t in range(H) :
         if t == 0 :
             model.addConstr(I0 + x[0] - d[0] == i[0])
-        else : 
+        else :
             model.addConstr(i[t-1] + x[t] - d[t] == i[t])
-        model.addConstr(x[t] <= Qmax * y[t] ) 
-        model.addConstr(x[t] >= Qmin * y[t] ) 
+        model.addConstr(x[t] <= Qmax * y[t] )
+        model.addConstr(x[t] >= Qmin * y[t] )
+    return x, y, i
+
+
+def build_lot_sizing_matrix(model, H, d, c, f, h, Qmin, Qmax, I0):
+    # Same model from NumPy arrays, every family of constraints in one call
+    d, c, f, h = (np.asarray(a, dtype=float) for a in (d, c, f, h))
+    x = model.addMVar(H, lb = 0, vtype = GRB.CONTINUOUS, name="x")
+    y = model.addMVar(H,         vtype = GRB.BINARY    , name="y")
+    i = model.addMVar(H, lb = 0, vtype = GRB.CONTINUOUS, name="i")
+
+    model.setObjective(c @ x + f @ y + h @ i)
+
+    # Inventory balance, the shifted difference i[t] - i[t-1] for t >= 1
+    model.addConstr(i[0] - x[0] == I0 - d[0],              name="balance_0")
+    model.addConstr(i[1:] - i[:-1] - x[1:] == -d[1:],      name="balance")
+    model.addConstr(x <= Qmax * y,                         name="Qmax")
+    model.addConstr(x >= Qmin * y,                         name="Qmin")
+    return x, y, i
+
+
+# ----- Dynamic programming -----
+# For a fixed setup plan y the problem is a min-cost flow with integer data, so
+# some optimal plan has integer quantities. With integer demands, Qmin, Qmax and
+# I0, the DP below over the integer inventory levels is therefore exact:
+#     V_t[I] = h_t*I + min( V_{t-1}[I + d_t],                                 (no setup)
+#                           min_{Qmin <= q <= Qmax} V_{t-1}[I + d_t - q] + c_t*q + f_t )
+# The inventory at the end of t never needs to exceed the remaining demand plus
+# one batch (or the initial stock left, I0 - d_1 - ... - d_t, when larger), and
+# cannot exceed what could be produced so far, which bounds the states.
+# The DP is pseudo-polynomial: O(H * (D + I0 + Qmax) * Qmax) for a total demand
+# D, so its time grows with the size of the quantities and not only with H
+# (multiplying every quantity of the sample instance by 50 takes it from about
+# 0.01 s to 1.5 s).
+
+def solve_lot_sizing_dp(H, d, c, f, h, Qmin, Qmax, I0):
+    d = np.asarray(d, dtype=float)
+    for value in (*d, Qmin, Qmax, I0):
+        if value != int(value):
+            raise ValueError("The lot-sizing DP needs integer demands, Qmin, Qmax and I0")
+    d = d.astype(int)
+    Qmin, Qmax, I0 = int(Qmin), int(Qmax), int(I0)
+    batches   = np.arange(max(Qmin, 1), Qmax + 1)
+    remaining = np.concatenate((np.cumsum(d[::-1])[::-1][1:], [0]))  # demand after t
+    reachable = I0 + Qmax * np.arange(1, H + 1) - np.cumsum(d)        # inventory if always at Qmax
+    carried   = I0 - np.cumsum(d)                                     # initial stock left after t
+
+    V = np.full(I0 + 1, np.inf)
+    V[I0] = 0.0
+    decisions = []
+    for t in range(H):
+        levels = np.arange(max(min(max(remaining[t] + Qmax, carried[t]), reachable[t]), 0) + 1)
+        best   = np.full(len(levels), np.inf)
+        best_q = np.zeros(len(levels), dtype=np.int32)
+        for q in np.concatenate(([0], batches)):
+            prev = levels + d[t] - q
+            ok   = (prev >= 0) & (prev < len(V))
+            cost = np.full(len(levels), np.inf)
+            cost[ok] = V[prev[ok]] + (c[t] * q + f[t] if q > 0 else 0.0)
+            better = cost < best
+            best[better], best_q[better] = cost[better], q
+        V = best + h[t] * levels
+        decisions.append(best_q)
+
+    if not np.isfinite(V).any():
+        raise ValueError("Infeasible lot-sizing instance")
+    # Backtrack from the cheapest final inventory
+    level = int(np.argmin(V))
+    total_cost = float(V[level])
+    x = np.zeros(H)
+    I = np.zeros(H)
+    for t in range(H - 1, -1, -1):
+        I[t] = level
+        x[t] = decisions[t][level]
+        level = level + d[t] - int(x[t])
+    return total_cost, x, (x > 0).astype(float), I
+
+
+def set_mip_start(x, y, i, plan):
+    # plan = (x, y, I) arrays, e.g. from solve_lot_sizing_dp
+    x.Start, y.Start, i.Start = plan
+
+
+# ----- (l,S) cutting planes -----
+# For every period l and every subset S of {0..l} (Barany, Van Roy & Wolsey):
+#     sum_{t in S} x[t] <= sum_{t in S} d[t..l] * y[t] + i[l],    d[t..l] = d[t] + ... + d[l]
+# The LP relaxation of x[t] <= Qmax * y[t] violates many of them. For a given l,
+# the most violated one takes S = {t <= l : x*[t] > d[t..l] * y*[t]}, so each l
+# is separated in linear time from the node relaxation (x*, y*, i*).
+
+class CutCallbackData:
+    def __init__(self, x, y, i, d, max_cuts=50, epsilon=1e-6):
+        d = np.asarray(d, dtype=float)
+        cum = np.concatenate(([0.0], np.cumsum(d)))
+        self.x, self.y, self.i = x.tolist(), y.tolist(), i.tolist()
+        self.D = np.triu(cum[None, 1:] - cum[:-1, None])  # D[t,l] = d[t..l] for t <= l
+        self.max_cuts = max_cuts                          # cuts added per node
+        self.epsilon = epsilon
+        self.cuts_added = 0
+        self.rounds = 0
+
+
+def separate_ls(x_val, y_val, i_val, D, epsilon=1e-6):
+    """Most violated (l,S) inequality of every l, as (violation, l, S) sorted by violation."""
+    gain = np.triu(np.maximum(x_val[:, None] - D * y_val[:, None], 0.0))  # gain[t,l], t <= l
+    violation = gain.sum(axis=0) - i_val
+    cuts = []
+    for l in np.flatnonzero(violation > epsilon):
+        cuts.append((violation[l], l, np.flatnonzero(gain[:l + 1, l] > 0)))
+    cuts.sort(key=lambda cut: -cut[0])
+    return cuts
+
+
+def cut_callback(model, where, *, cbdata):
+    if where != GRB.Callback.MIPNODE:
+        return
+    if model.cbGet(GRB.Callback.MIPNODE_STATUS) != GRB.OPTIMAL:
+        return
+
+    x_val = np.array(model.cbGetNodeRel(cbdata.x))
+    y_val = np.array(model.cbGetNodeRel(cbdata.y))
+    i_val = np.array(model.cbGetNodeRel(cbdata.i))
+    cuts = separate_ls(x_val, y_val, i_val, cbdata.D, cbdata.epsilon)[:cbdata.max_cuts]
+    for _, l, S in cuts:
+        lhs = gp.quicksum(cbdata.x[t] - cbdata.D[t, l] * cbdata.y[t] for t in S)
+        model.cbCut(lhs - cbdata.i[l] <= 0)
+    cbdata.cuts_added += len(cuts)
+    cbdata.rounds += 1
+
+
+def solve_with_cuts(data, cuts=True, time_limit=600, output=0):
+    """Solve the matrix model, with or without the (l,S) callback, and return its statistics."""
+    with gp.Env(params={"OutputFlag": output}) as env, gp.Model(data[0], env=env) as model:
+        x, y, i = build_lot_sizing_matrix(model, *data[1:])
+        model.Params.TimeLimit = time_limit
+        callback_data = CutCallbackData(x, y, i, data[2])
+        if cuts:
+            # User cuts are expressed on the original variables
+            model.Params.PreCrush = 1
+            model.optimize(partial(cut_callback, cbdata=callback_data))
+        else:
+            model.optimize()
+        return {
+            "obj":     model.ObjVal if model.SolCount else float("nan"),
+            "bound":   model.ObjBound,
+            "nodes":   int(model.NodeCount),
+            "runtime": model.Runtime,
+            "cuts":    callback_data.cuts_added,
+        }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Single-item capacitated lot sizing")
+    parser.add_argument("--compare-cuts", type=int, nargs="*", metavar="H",
+                        help="compare the plain model and the (l,S) cuts on random horizons H")
+    args = parser.parse_args()
+
+    if args.compare_cuts:
+        for horizon in args.compare_cuts:
+            instance = generate_lot_sizing(horizon)
+            plain = solve_with_cuts(instance, cuts=False)
+            cut   = solve_with_cuts(instance, cuts=True)
+            print(f"H = {horizon:5d}  plain: {plain['nodes']:8d} nodes {plain['runtime']:8.2f} s   "
+                  f"(l,S): {cut['nodes']:8d} nodes {cut['runtime']:8.2f} s {cut['cuts']:6d} cuts   "
+                  f"obj = {plain['obj']:.2f} / {cut['obj']:.2f}")
+    else:
+        name, H, d, c, f, h, Qmin, Qmax, I0 = data = load_lot_sizing()
+
+        dp_cost, *plan = solve_lot_sizing_dp(*data[1:])
+        assert abs(dp_cost - 1198.5) < 1e-9
+        print(f"DP total cost = {dp_cost:.2f}")
+
+        with gp.Env() as env, gp.Model(name, env=env) as model:
+            x, y, i = build_lot_sizing_matrix(model, *data[1:])
+            set_mip_start(x, y, i, plan)
 
-    # Optimize
-    model.optimize()
+            # Optimize
+            model.optimize()
 
-    if model.SolCount:
-        assert model.ObjVal == 1198.5
-        print(f"Total cost = {model.ObjVal:.2f}")
-        for t in range(H):
-            print(f"t={t:2d}: y={int(y[t].X)} x={x[t].X:.1f} I={i[t].X:.1f}")
\ No newline at end of file
+            if model.SolCount:
+                assert model.ObjVal == 1198.5
+                print(f"Total cost = {model.ObjVal:.2f}")
+                plan = extract(model, {"x": x, "y": y, "i": i}, {}, attrs=("X",))
+                for t in range(H):
+                    print(f"t={t:2d}: y={int(round(plan['y'].X[t]))} x={plan['x'].X[t]:.1f} I={plan['i'].X[t]:.1f}")
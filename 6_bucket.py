@@ -3,7 +3,7 @@ import gurobipy as gp
 from gurobipy import GRB , nlfunc
 
 
-with gp.Env() as env, gp.Model(name="portfolio", env=env) as model:
+def build_bucket(model, S=1.0, bounds=None):
     """
     Variables
         bottom radius r ≥ 0
@@ -21,11 +21,14 @@ with gp.Env() as env, gp.Model(name="portfolio", env=env) as model:
     Lateral area:
         A_lat=π(R+r)*√[(R−r)2+h2]
     Material constraint:
-        A_bot+A_lat=1.
+        A_bot+A_lat=S.
+
+    `bounds` maps "r", "R", "h" to (lb, ub), (0, 1) by default.
     """
-    r = model.addVar(lb = 0, ub = 1, vtype = GRB.CONTINUOUS, name="r") 
-    R = model.addVar(lb = 0, ub = 1, vtype = GRB.CONTINUOUS, name="R") 
-    h = model.addVar(lb = 0, ub = 1, vtype = GRB.CONTINUOUS, name="h")
+    bounds = {"r": (0, 1), "R": (0, 1), "h": (0, 1), **(bounds or {})}
+    r = model.addVar(lb = bounds["r"][0], ub = bounds["r"][1], vtype = GRB.CONTINUOUS, name="r")
+    R = model.addVar(lb = bounds["R"][0], ub = bounds["R"][1], vtype = GRB.CONTINUOUS, name="R")
+    h = model.addVar(lb = bounds["h"][0], ub = bounds["h"][1], vtype = GRB.CONTINUOUS, name="h")
 
     # V = math.pi * h * (R*R + R*r + r*r) / 3
     # model.setObjective(V, GRB.MAXIMIZE)
@@ -35,25 +38,29 @@ with gp.Env() as env, gp.Model(name="portfolio", env=env) as model:
     # model.addConstr(A_bot + A_lat == 1)
 
     # ============== Avec la correction ============== #
-    V = model.addVar(lb = 0,         vtype = GRB.CONTINUOUS, name="V") 
-    S = model.addVar(lb = 1, ub = 1, vtype = GRB.CONTINUOUS, name="S")
+    V    = model.addVar(lb = 0,         vtype = GRB.CONTINUOUS, name="V")
+    area = model.addVar(lb = S, ub = S, vtype = GRB.CONTINUOUS, name="S")
 
     model.setObjective(V, GRB.MAXIMIZE)
 
-    model.addConstr( math.pi * h * (R**2 + R*r + r**2) / 3 == V )
+    model.addConstr( math.pi * h * (R**2 + R*r + r**2) / 3 == V , name="volume")
     A_bot = math.pi * R**2
     A_lat = math.pi * (R + r) * nlfunc.sqrt((R - r)**2 + h**2)
-    model.addConstr( A_bot + A_lat == S)
+    model.addConstr( A_bot + A_lat == area, name="material")
+    return r, R, h, V, area
 
-    model.optimize()
 
-    if model.status == GRB.OPTIMAL :
-        total_value = model.ObjVal
-        print("===================================")
-        print(f"Optimal value \t= {total_value:.2f}")
-        print(f"Rayon du haut \t= {R.X:.2f}") 
-        print(f"Rayon du bas \t = {r.X:.2f}")
-        print(f"Hauteur \t = {h.X:.2f}") 
-        print("===================================")
+if __name__ == "__main__":
+    with gp.Env() as env, gp.Model(name="bucket", env=env) as model:
+        r, R, h, V, S = build_bucket(model)
 
+        model.optimize()
 
+        if model.status == GRB.OPTIMAL :
+            total_value = model.ObjVal
+            print("===================================")
+            print(f"Optimal value \t= {total_value:.2f}")
+            print(f"Rayon du haut \t= {R.X:.2f}") 
+            print(f"Rayon du bas \t = {r.X:.2f}")
+            print(f"Hauteur \t = {h.X:.2f}") 
+            print("===================================")
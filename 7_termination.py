@@ -1,54 +1,73 @@
+import argparse
+import numpy as np
 import gurobipy as gp
 from gurobipy import GRB
-from functools import partial
-import time
-
-class CallbackData:
-    def __init__(self):
-        self.last_gap_change_time = -GRB.INFINITY
-        self.last_gap = GRB.INFINITY
-
-
-def callback(model, where, *, cbdata):
-
-    # Récuperer le temps et la valeur du premier résultat
-    if where != GRB.Callback.MIP:
-        return
-    
-    if model.cbGet(GRB.Callback.MIP_SOLCNT) == 0:
-        return
-
-    time  = model.cbGet(GRB.Callback.RUNTIME)    # Elapsed solver runtime (seconds).
-    best  = model.cbGet(GRB.Callback.MIP_OBJBST) # Current best objective.
-    bound = model.cbGet(GRB.Callback.MIP_OBJBND) # Current best objective bound.
-    gap   = (bound - best) / best
-    if gap < cbdata.last_gap - epsilon_to_compare_gap :
-        print("Meilleur résultat significatif de trouvé : ")
-        print(f"gap = {gap} %,\t temps = {time} seconds")
-        cbdata.last_gap_change_time = time
-        cbdata.last_gap = gap
-        return
-    
-    if time - cbdata.last_gap_change_time > max_time_between_gap_updates :
-        model.terminate()
-    # Use model.terminate() to end the search when required...
-    # ...
-
-
-with gp.Env() as env, gp.read("data/mkp.mps.bz2") as model:
-    # Global variables used in the callback function
-    max_time_between_gap_updates = 15
-    epsilon_to_compare_gap = 1e-4
-
-    # Initialize data passed to the callback function
-    callback_data = CallbackData()
-    print("\n===============================================")
-    print(f"max_time_between_gap_updates       : {max_time_between_gap_updates}")
-    print(f"epsilon_to_compare_gap             : {epsilon_to_compare_gap}")
-    print(f"callback_data.last_gap             : {callback_data.last_gap}")
-    print(f"callback_data.last_gap_change_time : {callback_data.last_gap_change_time}")
-    print("=============================================\n")
-
-    callback_func = partial(callback, cbdata=callback_data)
-
-    model.optimize(callback_func)
\ No newline at end of file
+from telemetry import ProgressRecorder, GapPlateau, TimeToTarget, WorkLimit
+from modelcache import ModelCache
+
+# ============================= Explications ============================= #
+# The solve of data/mkp.mps.bz2 stops when the gap has not improved by more
+# than epsilon_to_compare_gap for max_time_between_gap_updates seconds. This
+# rule is the GapPlateau policy of telemetry.py, the recorder also samples the
+# incumbent, bound, gap, nodes and work, written with --telemetry.
+
+
+def generate_mkp(num_items, num_constraints, seed=0):
+    # Correlated random instance in the style of data/mkp.mps.bz2 (Chu & Beasley):
+    # capacities at half of the total weights, values correlated with the weights
+    rng = np.random.default_rng(seed=seed)
+    weights = rng.integers(low=1, high=1000, size=(num_constraints, num_items))
+    capacity = 0.5 * weights.sum(axis=1)
+    values = weights.sum(axis=0) / num_constraints + rng.integers(low=1, high=500, size=num_items)
+    return values, weights, capacity
+
+
+def build_mkp(model, values, weights, capacity):
+    x = model.addMVar(len(values), vtype=GRB.BINARY, name="x")
+    model.setObjective(values @ x, GRB.MAXIMIZE)
+    model.addConstr(weights @ x <= capacity, name="capacity")
+    return x
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Multidimensional knapsack with stopping rules")
+    parser.add_argument("--model", default="data/mkp.mps.bz2")
+    parser.add_argument("--patience", type=float, default=15, help="max_time_between_gap_updates")
+    parser.add_argument("--epsilon", type=float, default=1e-4, help="epsilon_to_compare_gap")
+    parser.add_argument("--target-gap", type=float, help="stop at this gap")
+    parser.add_argument("--work-limit", type=float, help="stop after this many work units")
+    parser.add_argument("--interval", type=float, default=1.0, help="seconds between two samples")
+    parser.add_argument("--telemetry", help="JSON lines (or .csv) file for the samples")
+    parser.add_argument("--cache", help="model cache directory: uncompressed model and best solution as start")
+    args = parser.parse_args()
+
+    cache = ModelCache(args.cache) if args.cache else None
+    with gp.Env() as env:
+        if cache:
+            key, model = cache.read(args.model, env=env)
+        else:
+            model = gp.read(args.model, env=env)
+        with model:
+            max_time_between_gap_updates = args.patience
+            epsilon_to_compare_gap = args.epsilon
+
+            policies = [GapPlateau(max_time_between_gap_updates, epsilon_to_compare_gap, verbose=True)]
+            if args.target_gap is not None:
+                policies.append(TimeToTarget(gap=args.target_gap))
+            if args.work_limit is not None:
+                policies.append(WorkLimit(args.work_limit))
+            recorder = ProgressRecorder(interval=args.interval, policies=policies, path=args.telemetry)
+
+            print("\n===============================================")
+            print(f"max_time_between_gap_updates       : {max_time_between_gap_updates}")
+            print(f"epsilon_to_compare_gap             : {epsilon_to_compare_gap}")
+            print(f"policies                           : {', '.join(type(p).__name__ for p in policies)}")
+            print("=============================================\n")
+
+            model.optimize(recorder.attach(model))
+
+            print(f"Stopped by : {recorder.stopped_by or 'solver'}  ({recorder.num_samples} samples)")
+            if args.telemetry:
+                recorder.flush()
+            if cache and cache.save_solution(key, model):
+                print(f"New best solution cached in {args.cache}")
@@ -1,5 +1,7 @@
 import gurobipy as gp
 from gurobipy import GRB
+from solution import values
+from profiler import PhaseProfiler
 
 # 24 Hour Load Forecast (MW)
 load_forecast = [
@@ -63,11 +65,12 @@ def show_results():
         print("%4s" % t, end=" ")
     print("\n")
 
-    # for g in thermal_units:
+    # All the outputs in one call, in the order of addVars: unit by unit
+    power = values(model, thermal_units_out_power).reshape(len(thermal_units), nTimeIntervals)
     for g in range(len(thermal_units)) :
         print("%5s" % g, end=" ")
         for t in range(nTimeIntervals):
-            print("%4.1f" % thermal_units_out_power[(thermal_units[g], t)].X, end=" ")
+            print("%4.1f" % power[g, t], end=" ")
         print("\n")
 
     print("%5s" % "Solar", end=" ")
@@ -81,106 +84,118 @@ def show_results():
     print("\n")
 
 
+# Opt-in: PROFILE=1 prints the time and memory of each phase, PROFILE=run.json appends them
+profiler = PhaseProfiler.from_env()
+
 with gp.Env() as env, gp.Model(env=env) as model:
 
-    # add variables for thermal units (power and statuses for commitment, startup and shutdown)
-
-    # Output power for unit i at time interval t (MW )                                   pit
-    thermal_units_out_power = model.addVars(
-        thermal_units, nTimeIntervals, 
-        vtype = GRB.CONTINUOUS,
-        lb = 0,
-        name="thermal_units_out_power"
-    )
-
-    # Startup Status for thermal unit i at time interval t (1: Start Up, 0: Otherwise)    vit
-    thermal_units_startup_status = model.addVars(
-        thermal_units, nTimeIntervals,
-        vtype = GRB.BINARY,
-        name="thermal_unit_startup_status",
-    ) 
-
-    # Shutdown Status for thermal unit i at time interval t (1: Shutdown, 0: Otherwise)   wit
-    thermal_units_shutdown_status = model.addVars(
-        thermal_units, nTimeIntervals,
-        vtype = GRB.BINARY,
-        name="thermal_unit_shutdown_status",
-    ) 
-
-    # Commitment Status for thermal unit i at time interval t (1: Online, 0: Otherwise))  uit
-    thermal_units_comm_status = model.addVars(
-        thermal_units, nTimeIntervals,
-        vtype = GRB.BINARY,
-        name="thermal_unit_comm_status"
-    ) 
-
-    # define objective function as an empty quadratic construct and add terms
-    obj_fun_expr = gp.QuadExpr(0)
-    for t in range(nTimeIntervals):
-        for g in thermal_units:
-            obj_fun_expr.add(γi[g] * thermal_units_out_power[(g,t)]**2   +
-                             βi[g] * thermal_units_out_power[(g,t)]      +
-                             αi[g] * thermal_units_comm_status[(g,t)]    +  
-                             δi[g] * thermal_units_startup_status[(g,t)] +
-                             ζi[g] * thermal_units_shutdown_status[(g,t)]) 
-    model.setObjective(obj_fun_expr)
-
-    # Power balance equations
-    for t in range(nTimeIntervals):
-        model.addConstr(
-            gp.quicksum(thermal_units_out_power[(g,t)] for g in thermal_units) == Lt[t] - St[t] ,
-            name="power_balance_" + str(t),
+    with profiler.phase("variables", model):
+        # add variables for thermal units (power and statuses for commitment, startup and shutdown)
+
+        # Output power for unit i at time interval t (MW )                                   pit
+        thermal_units_out_power = model.addVars(
+            thermal_units, nTimeIntervals, 
+            vtype = GRB.CONTINUOUS,
+            lb = 0,
+            name="thermal_units_out_power"
         )
 
-    # Thermal units physical constraints, using indicator constraints
-    for t in range(nTimeIntervals):
-        for g in thermal_units:
-            model.addGenConstrIndicator(
-                thermal_units_comm_status[(g, t)],  # binary indicator variable
-                1,                                  # when status = 1
-                thermal_units_out_power[(g, t)],    # left-hand side
-                GRB.GREATER_EQUAL,                  # sense
-                pi_min[g],                          # right-hand side
-                name=f"min_power_{g}_{t}"
-                # thermal_units_comm_status[(g,t)] * pi_min[g] <= thermal_units_out_power[(g,t)]
-            )
-            model.addGenConstrIndicator(
-                thermal_units_comm_status[(g, t)],  # binary indicator variable
-                1,                                  # when status = 1
-                thermal_units_out_power[(g, t)],    # left-hand side
-                GRB.LESS_EQUAL,                     # sense
-                pi_max[g],                          # right-hand side
-                name=f"max_power_{g}_{t}"
-                # thermal_units_out_power[(g,t)] <= thermal_units_comm_status[(g,t)] * pi_max[g]
-            )
-            model.addGenConstrIndicator(
-                thermal_units_comm_status[(g, t)],  # binary indicator variable
-                0,                                  # when status = 1
-                thermal_units_out_power[(g, t)],    # left-hand side
-                GRB.EQUAL,                          # sense
-                0,                                  # right-hand side
-                name=f"max_power_{g}_{t}"
-                # thermal_units_comm_status[(g,t)] * pi_min[g] <= thermal_units_comm_status[(g,t)] * pi_max[g]
+        # Startup Status for thermal unit i at time interval t (1: Start Up, 0: Otherwise)    vit
+        thermal_units_startup_status = model.addVars(
+            thermal_units, nTimeIntervals,
+            vtype = GRB.BINARY,
+            name="thermal_unit_startup_status",
+        ) 
+
+        # Shutdown Status for thermal unit i at time interval t (1: Shutdown, 0: Otherwise)   wit
+        thermal_units_shutdown_status = model.addVars(
+            thermal_units, nTimeIntervals,
+            vtype = GRB.BINARY,
+            name="thermal_unit_shutdown_status",
+        ) 
+
+        # Commitment Status for thermal unit i at time interval t (1: Online, 0: Otherwise))  uit
+        thermal_units_comm_status = model.addVars(
+            thermal_units, nTimeIntervals,
+            vtype = GRB.BINARY,
+            name="thermal_unit_comm_status"
+        ) 
+
+    with profiler.phase("objective", model):
+        # define objective function as an empty quadratic construct and add terms
+        obj_fun_expr = gp.QuadExpr(0)
+        for t in range(nTimeIntervals):
+            for g in thermal_units:
+                obj_fun_expr.add(γi[g] * thermal_units_out_power[(g,t)]**2   +
+                                 βi[g] * thermal_units_out_power[(g,t)]      +
+                                 αi[g] * thermal_units_comm_status[(g,t)]    +  
+                                 δi[g] * thermal_units_startup_status[(g,t)] +
+                                 ζi[g] * thermal_units_shutdown_status[(g,t)]) 
+        model.setObjective(obj_fun_expr)
+
+    with profiler.phase("power_balance", model):
+        # Power balance equations
+        for t in range(nTimeIntervals):
+            model.addConstr(
+                gp.quicksum(thermal_units_out_power[(g,t)] for g in thermal_units) == Lt[t] - St[t] ,
+                name="power_balance_" + str(t),
             )
 
-    # Thermal units logical constraints
-    for t in range(nTimeIntervals):
-        for g in thermal_units:
-            if t == 0:
-                model.addConstr(
-                    thermal_units_comm_status[(g,t)] - init_status[g] == thermal_units_startup_status[(g,t)] - thermal_units_shutdown_status[(g,t)],
-                    name="logical1_" + g + "_" + str(t),
+    with profiler.phase("indicators", model):
+        # Thermal units physical constraints, using indicator constraints
+        for t in range(nTimeIntervals):
+            for g in thermal_units:
+                model.addGenConstrIndicator(
+                    thermal_units_comm_status[(g, t)],  # binary indicator variable
+                    1,                                  # when status = 1
+                    thermal_units_out_power[(g, t)],    # left-hand side
+                    GRB.GREATER_EQUAL,                  # sense
+                    pi_min[g],                          # right-hand side
+                    name=f"min_power_{g}_{t}"
+                    # thermal_units_comm_status[(g,t)] * pi_min[g] <= thermal_units_out_power[(g,t)]
+                )
+                model.addGenConstrIndicator(
+                    thermal_units_comm_status[(g, t)],  # binary indicator variable
+                    1,                                  # when status = 1
+                    thermal_units_out_power[(g, t)],    # left-hand side
+                    GRB.LESS_EQUAL,                     # sense
+                    pi_max[g],                          # right-hand side
+                    name=f"max_power_{g}_{t}"
+                    # thermal_units_out_power[(g,t)] <= thermal_units_comm_status[(g,t)] * pi_max[g]
+                )
+                model.addGenConstrIndicator(
+                    thermal_units_comm_status[(g, t)],  # binary indicator variable
+                    0,                                  # when status = 1
+                    thermal_units_out_power[(g, t)],    # left-hand side
+                    GRB.EQUAL,                          # sense
+                    0,                                  # right-hand side
+                    name=f"max_power_{g}_{t}"
+                    # thermal_units_comm_status[(g,t)] * pi_min[g] <= thermal_units_comm_status[(g,t)] * pi_max[g]
                 )
-            else:
+
+    with profiler.phase("logical", model):
+        # Thermal units logical constraints
+        for t in range(nTimeIntervals):
+            for g in thermal_units:
+                if t == 0:
+                    model.addConstr(
+                        thermal_units_comm_status[(g,t)] - init_status[g] == thermal_units_startup_status[(g,t)] - thermal_units_shutdown_status[(g,t)],
+                        name="logical1_" + g + "_" + str(t),
+                    )
+                else:
+                    model.addConstr(
+                        thermal_units_comm_status[(g,t)] - thermal_units_comm_status[(g,t-1)] == thermal_units_startup_status[(g,t)] - thermal_units_shutdown_status[(g,t)],
+                        name="logical1_" + g + "_" + str(t),
+                    )
+
                 model.addConstr(
-                    thermal_units_comm_status[(g,t)] - thermal_units_comm_status[(g,t-1)] == thermal_units_startup_status[(g,t)] - thermal_units_shutdown_status[(g,t)],
-                    name="logical1_" + g + "_" + str(t),
+                    thermal_units_startup_status[(g,t)] + thermal_units_shutdown_status[(g,t)] <= 1,
+                    name="logical2_" + g + "_" + str(t),
                 )
 
-            model.addConstr(
-                thermal_units_startup_status[(g,t)] + thermal_units_shutdown_status[(g,t)] <= 1,
-                name="logical2_" + g + "_" + str(t),
-            )
+    with profiler.phase("optimize", model):
+        model.optimize()
+    with profiler.phase("results"):
+        show_results()
 
-    model.optimize()
-    show_results()
\ No newline at end of file
+profiler.report(script="8_commitment")
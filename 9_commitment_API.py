@@ -1,6 +1,10 @@
+import argparse
 import numpy as np
+import pandas as pd
+import scipy.sparse as sp
 import gurobipy as gp
 from gurobipy import GRB
+from solution import values, extract, write_frames
 
 # /!\ /!\ /!\ /!\ /!\ /!\ /!\ /!\ /!\ /!\ /!\ /!\ /!\ /!\ /!\ 
 # /!\ CHANGER DONNEES EN LISTES, NE PLUS UTILISER DE DICO /!\ 
@@ -62,37 +66,63 @@ pi_min      = dic_to_array(thermal_units, pmin       )  # Minimum Power for unit
 Lt          = load_forecast                              # Load Forecast at time interval t (MW)
 St          = solar_forecast                             # Solar Energy Forecast at time interval t (MW)
 
-def show_results():
+def load_thermal_units(path="data/thermal_units.csv"):
+    # One row per unit, columns pmin, pmax, a, b, c, startup, shutdown, init_status
+    # (CSV or JSON records), returned in the order of the arguments of build_commitment
+    table = pd.read_json(path) if str(path).endswith(".json") else pd.read_csv(path)
+    columns = ["init_status", "pmin", "pmax", "a", "b", "c", "startup", "shutdown"]
+    return tuple(table[column].to_numpy(dtype=float) for column in columns)
+
+
+def show_results(model, thermal_units_out_power, Lt, St):
     obj_val_s = model.ObjVal
     print(f" OverAll Cost = {round(obj_val_s, 2)}	")
     print("\n")
     print("%5s" % "time", end=" ")
-    for t in range(nTimeIntervals):
+    for t in range(len(Lt)):
         print("%4s" % t, end=" ")
     print("\n")
 
-    # for g in range (len(thermal_units)):
-    for g in range(len(thermal_units)) :
+    power = values(model, thermal_units_out_power)
+    for g in range(power.shape[0]) :
         print("%5s" % g, end=" ")
-        for t in range(nTimeIntervals):
-            print("%4.1f" % thermal_units_out_power[g, t].X, end=" ")
+        for t in range(len(Lt)):
+            print("%4.1f" % power[g, t], end=" ")
         print("\n")
 
     print("%5s" % "Solar", end=" ")
-    for t in range(nTimeIntervals):
-        print("%4.1f" % solar_forecast[t], end=" ")
+    for t in range(len(Lt)):
+        print("%4.1f" % St[t], end=" ")
     print("\n")
 
     print("%5s" % "Load", end=" ")
-    for t in range(nTimeIntervals):
-        print("%4.1f" % load_forecast[t], end=" ")
+    for t in range(len(Lt)):
+        print("%4.1f" % Lt[t], end=" ")
     print("\n")
 
 
-with gp.Env() as env, gp.Model(env=env) as model:
-
+def generate_commitment(num_units, num_periods, seed=0, periods_per_day=24):
+    # Random instance with the same structure as the data above, always feasible:
+    # the net load stays between the largest pmax and 80% of the total capacity.
+    # The load has a daily cycle of periods_per_day periods (96 for 15 minutes)
+    rng = np.random.default_rng(seed=seed)
+    pi_max = rng.uniform(low=3, high=10, size=num_units)
+    pi_min = 0.3 * pi_max
+    αi = np.full(num_units, 5.0)
+    βi = rng.uniform(low=0.5, high=3.0, size=num_units)
+    γi = rng.uniform(low=0.5, high=2.0, size=num_units)
+    δi = np.full(num_units, 2.0)
+    ζi = np.full(num_units, 1.0)
+    init_status = np.zeros(num_units)
+    profile = 0.5 + 0.5 * np.sin(np.linspace(0, 2 * np.pi * num_periods / periods_per_day, num_periods)) ** 2
+    Lt = pi_max.max() + profile * (0.8 * pi_max.sum() - pi_max.max())
+    St = np.zeros(num_periods)
+    return init_status, pi_min, pi_max, αi, βi, γi, δi, ζi, Lt, St
+
+
+def build_commitment(model, init_status, pi_min, pi_max, αi, βi, γi, δi, ζi, Lt, St, formulation="indicator"):
     # Output power for unit i at time interval t (MW )                                    pit
-    shape = tuple([len(thermal_units), nTimeIntervals])
+    shape = tuple([len(pi_max), len(Lt)])
     thermal_units_out_power = model.addMVar(
         shape = shape, 
         vtype = GRB.CONTINUOUS,
@@ -121,65 +151,70 @@ with gp.Env() as env, gp.Model(env=env) as model:
         name="thermal_unit_comm_status"
     ) 
 
-    # define objective function as an empty quadratic construct and add terms
-    model.setObjective( 
-        (γi[:,None] * thermal_units_out_power**2).sum()   + 
-        (βi[:,None] * thermal_units_out_power).sum()      +
-        (αi[:,None] * thermal_units_comm_status).sum()    +  
-        (δi[:,None] * thermal_units_startup_status).sum() +
-        (ζi[:,None] * thermal_units_shutdown_status).sum()
-    )         
-
-    # Power balance equations
-    model.addConstr(
-        thermal_units_out_power.sum(axis=0) == np.array(Lt) - np.array(St) ,
-        name="power_balance",
-    )
-
-    # Thermal units physical constraints, using indicator constraints
-    for g in range (len(thermal_units)):
-        model.addGenConstrIndicator(
-            thermal_units_comm_status[g,:],  # binary indicator variable
-            1,                                  # when status = 1
-            thermal_units_out_power[g,:],    # left-hand side
-            GRB.GREATER_EQUAL,                  # sense
-            pi_min[g],                          # right-hand side
-            name=f"min_power_{g}"
-            # thermal_units_comm_status[(g,t)] * pi_min[g] <= thermal_units_out_power[(g,t)]
-        )
-        model.addGenConstrIndicator(
-            thermal_units_comm_status[g,:],  # binary indicator variable
-            1,                                  # when status = 1
-            thermal_units_out_power[g,:],    # left-hand side
-            GRB.LESS_EQUAL,                     # sense
-            pi_max[g],                          # right-hand side
-            name=f"max_power_{g}"
-            # thermal_units_out_power[(g,t)] <= thermal_units_comm_status[(g,t)] * pi_max[g]
-        )
-        model.addGenConstrIndicator(
-            thermal_units_comm_status[g,:],  # binary indicator variable
-            0,                                  # when status = 1
-            thermal_units_out_power[g,:],    # left-hand side
-            GRB.EQUAL,                          # sense
-            0,                                  # right-hand side
-            name=f"max_power_{g}"
-            # thermal_units_comm_status[(g,t)] * pi_min[g] <= thermal_units_comm_status[(g,t)] * pi_max[g]
-        )
-
-    # Thermal units logical constraints
-    model.addConstr(
-        thermal_units_comm_status[:, 0] - init_status == thermal_units_startup_status[:, 0] - thermal_units_shutdown_status[:, 0],
-        name="logical1_case_0"
-    )
-    model.addConstr(
-        thermal_units_comm_status[:, 1:] - thermal_units_comm_status[:, :-1] == thermal_units_startup_status[:, 1:] - thermal_units_shutdown_status[:, 1:],
-        name="logical1_0"
+    # Every (g,t) block is used flattened (index g*T + t) with sparse operators,
+    # which is much faster to build than the element-wise 2D MVar expressions
+    G, T = shape
+    n    = G * T
+    p, v, w, u = (var.reshape(-1) for var in (thermal_units_out_power, thermal_units_startup_status,
+                                              thermal_units_shutdown_status, thermal_units_comm_status))
+    per_gt = lambda values: np.repeat(np.asarray(values, dtype=float), T)  # (G,) -> (G*T,)
+    I = sp.eye(n, format="csr")
+
+    # define objective function as a quadratic form and linear terms
+    model.setObjective(
+        p @ sp.diags(per_gt(γi)) @ p +
+        per_gt(βi) @ p               +
+        per_gt(αi) @ u               +
+        per_gt(δi) @ v               +
+        per_gt(ζi) @ w
     )
 
+    # Power balance equations: S sums the units of every period
+    S = sp.kron(np.ones((1, G)), sp.eye(T), format="csr")
     model.addConstr(
-        thermal_units_startup_status + thermal_units_shutdown_status <= 1,
-        name="logical2",
+        S @ p == np.asarray(Lt, dtype=float) - np.asarray(St, dtype=float),
+        name="power_balance",
     )
 
-    model.optimize()
-    show_results()
\ No newline at end of file
+    # Thermal units physical constraints, for all (g,t) at once
+    if formulation == "indicator":
+        # comm_status = 1  =>  pi_min <= out_power <= pi_max,   comm_status = 0  =>  out_power = 0
+        model.addGenConstrIndicator(u, True,  p >= per_gt(pi_min), name="min_power")
+        model.addGenConstrIndicator(u, True,  p <= per_gt(pi_max), name="max_power")
+        model.addGenConstrIndicator(u, False, p == 0,              name="off_power")
+    elif formulation == "linking":
+        # pi_min * comm_status <= out_power <= pi_max * comm_status, the same three
+        # implications with linear rows, whose LP relaxation is the convex hull in (p, u)
+        model.addConstr(I @ p - sp.diags(per_gt(pi_min)) @ u >= 0, name="min_power")
+        model.addConstr(I @ p - sp.diags(per_gt(pi_max)) @ u <= 0, name="max_power")
+    else:
+        raise ValueError(f"Unknown formulation: {formulation}")
+
+    # Thermal units logical constraints: u[t] - u[t-1] == v[t] - w[t], u[-1] = init_status.
+    # D is the block-diagonal difference operator, the t = 0 term moves to the RHS
+    D = sp.kron(sp.eye(G), sp.eye(T) - sp.eye(T, k=-1), format="csr")
+    initial = np.zeros(n)
+    initial[::T] = init_status
+    model.addConstr(D @ u - I @ v + I @ w == initial, name="logical1")
+    model.addConstr(I @ v + I @ w <= 1,                name="logical2")
+
+    return thermal_units_out_power, thermal_units_startup_status, thermal_units_shutdown_status, thermal_units_comm_status
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Unit commitment with the matrix API")
+    parser.add_argument("--units", help="table of the thermal units (CSV or JSON), default: the data above")
+    parser.add_argument("--formulation", default="indicator", choices=["indicator", "linking"])
+    parser.add_argument("--solution", help="directory (CSV per variable group) or .npz file for the solution")
+    args = parser.parse_args()
+
+    units = load_thermal_units(args.units) if args.units else (init_status, pi_min, pi_max, αi, βi, γi, δi, ζi)
+    with gp.Env() as env, gp.Model(env=env) as model:
+        data = (*units, Lt, St)
+        thermal_units_out_power, startup, shutdown, comm = build_commitment(model, *data, formulation=args.formulation)
+
+        model.optimize()
+        show_results(model, thermal_units_out_power, Lt, St)
+        if args.solution:
+            groups = {"power": thermal_units_out_power, "startup": startup, "shutdown": shutdown, "commitment": comm}
+            write_frames(extract(model, groups), args.solution)
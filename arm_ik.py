@@ -0,0 +1,155 @@
+import os
+import time
+import argparse
+import importlib
+import numpy as np
+import gurobipy as gp
+from concurrent.futures import ProcessPoolExecutor
+
+# ============================= Explications ============================= #
+# Batched inverse kinematics of the two-link arm of 10_Robotic_Arm.py.
+# For a target (x, y) at distance ρ from the base, the law of cosines gives
+#     cos θ2 = (ρ² - L1² - L2²) / (2 L1 L2)
+#     θ1     = atan2(y, x) - atan2(L2 sin θ2, L1 + L2 cos θ2)
+# with two branches θ2 = ±arccos(...) (elbow down / up), computed for all the
+# targets at once. A branch is kept when it satisfies the constraints of the
+# Gurobi model: joint limits, end-effector and link midpoint in x, y >= 0, and
+# midpoint outside the disk (xo, yo, r). The first valid branch, θ2 = +arccos
+# before θ2 = -arccos, is an exact optimum (distance 0).
+#
+# The other targets go to the nonlinear model build_arm: the ones with no
+# valid branch (unreachable, or blocked by the limits or the obstacle), and the
+# ambiguous ones, too close to a singularity (|cos θ2| ≈ 1) or to the boundary
+# of a constraint for the analytic answer to be trusted. These solves are
+# warm-started from the analytic solution of the target projected onto the
+# reachable annulus, and spread over a process pool.
+#
+#   python arm_ik.py --targets 10000 --workers 4
+
+arm = importlib.import_module("10_Robotic_Arm")
+
+DEFAULTS = {"L1": arm.L1, "L2": arm.L2, "xo": arm.xo, "yo": arm.yo, "r": arm.r,
+            "theta1_limits": (arm.theta1_min, arm.theta1_max),
+            "theta2_limits": (arm.theta2_min, arm.theta2_max)}
+
+
+def wrap_angle(theta):
+    return (theta + np.pi) % (2 * np.pi) - np.pi
+
+
+def forward(theta1, theta2, L1, L2):
+    return (L1 * np.cos(theta1) + L2 * np.cos(theta1 + theta2),
+            L1 * np.sin(theta1) + L2 * np.sin(theta1 + theta2))
+
+
+def analytic_ik(x, y, L1, L2):
+    """Both branches (N, 2) of θ1 and θ2 for the targets projected onto the reachable annulus."""
+    x, y = np.asarray(x, dtype=float), np.asarray(y, dtype=float)
+    rho = np.hypot(x, y)
+    # Unreachable targets are replaced by the closest reachable point in the same direction
+    scale = np.clip(rho, abs(L1 - L2), L1 + L2) / np.where(rho > 0, rho, 1.0)
+    x, y = np.where(rho > 0, x * scale, abs(L1 - L2)), np.where(rho > 0, y * scale, 0.0)
+    cos2 = np.clip((x**2 + y**2 - L1**2 - L2**2) / (2 * L1 * L2), -1.0, 1.0)
+    theta2 = np.arccos(cos2)[:, None] * np.array([1.0, -1.0])
+    theta1 = np.arctan2(y, x)[:, None] - np.arctan2(L2 * np.sin(theta2), L1 + L2 * np.cos(theta2))
+    return wrap_angle(theta1), theta2, cos2
+
+
+def pose_margins(theta1, theta2, L1, L2, xo, yo, r, theta1_limits, theta2_limits):
+    """Smallest slack of the constraints of build_arm for every pose, negative if violated."""
+    mx, my = L1 / 2 * np.cos(theta1), L1 / 2 * np.sin(theta1)
+    x = 2 * mx + L2 * np.cos(theta1 + theta2)
+    y = 2 * my + L2 * np.sin(theta1 + theta2)
+    return np.minimum.reduce([
+        theta1 - theta1_limits[0], theta1_limits[1] - theta1,
+        theta2 - theta2_limits[0], theta2_limits[1] - theta2,
+        x, y, mx, my,
+        np.hypot(mx - xo, my - yo) - r,
+    ])
+
+
+def batch_ik(targets, tol=1e-6, workers=1, **params):
+    """
+    Joint angles for an (N, 2) array of targets. Return a dict of arrays:
+    theta1, theta2, distance (to the target) and analytic (True when no
+    Gurobi solve was needed).
+    """
+    params = {**DEFAULTS, **params}
+    targets = np.asarray(targets, dtype=float)
+    theta1, theta2, cos2 = analytic_ik(targets[:, 0], targets[:, 1], params["L1"], params["L2"])
+    margins = pose_margins(theta1, theta2, **params)
+
+    rho = np.hypot(targets[:, 0], targets[:, 1])
+    reachable = (rho >= abs(params["L1"] - params["L2"])) & (rho <= params["L1"] + params["L2"])
+    valid = reachable[:, None] & (margins >= 0)
+    # First valid branch, the +arccos one when both are
+    branch = np.where(valid[:, 0], 0, 1)
+    rows = np.arange(len(targets))
+    analytic = (valid.any(axis=1)
+                & (np.abs(np.abs(cos2) - 1) > tol)
+                & (margins[rows, branch] > tol))
+
+    result = {
+        "theta1":   theta1[rows, branch],
+        "theta2":   theta2[rows, branch],
+        "distance": np.zeros(len(targets)),
+        "analytic": analytic,
+    }
+
+    fallback = np.flatnonzero(~analytic)
+    if len(fallback):
+        # Warm start: the branch with the largest margin, even if negative
+        start = np.argmax(margins[fallback], axis=1)
+        jobs = [(targets[i], theta1[i, b], theta2[i, b], params) for i, b in zip(fallback, start)]
+        if workers > 1:
+            chunksize = max(1, len(jobs) // (4 * workers))
+            with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(1,)) as pool:
+                solutions = list(pool.map(_solve_target, jobs, chunksize=chunksize))
+        else:
+            _init_worker(0)
+            solutions = [_solve_target(job) for job in jobs]
+        for i, (t1, t2, distance) in zip(fallback, solutions):
+            result["theta1"][i], result["theta2"][i], result["distance"][i] = t1, t2, distance
+    return result
+
+
+# ============================= Fallback ============================= #
+_env = None
+
+
+def _init_worker(threads):
+    # One Env per worker process, kept for all its targets
+    global _env
+    if _env is None:
+        _env = gp.Env(params={"OutputFlag": 0, "Threads": threads})
+
+
+def _solve_target(job):
+    target, theta1_start, theta2_start, params = job
+    with gp.Model(env=_env) as model:
+        theta1, theta2, *_, dist = arm.build_arm(model, *target, **params)
+        theta1.Start, theta2.Start = theta1_start, theta2_start
+        model.optimize()
+        if model.SolCount == 0:
+            return np.nan, np.nan, np.inf
+        return theta1.X, theta2.X, dist.X
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Batched inverse kinematics of the two-link arm")
+    parser.add_argument("--targets", type=int, default=10000)
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(args.seed)
+    targets = rng.uniform(low=0, high=arm.L1 + arm.L2, size=(args.targets, 2))
+    start = time.perf_counter()
+    result = batch_ik(targets, workers=args.workers)
+    elapsed = time.perf_counter() - start
+    fallback = ~result["analytic"]
+    x, y = forward(result["theta1"], result["theta2"], arm.L1, arm.L2)
+    error = np.hypot(x - targets[:, 0], y - targets[:, 1])
+    print(f"{args.targets} targets in {elapsed:.2f} s, {fallback.sum()} sent to Gurobi "
+          f"({np.isfinite(result['distance'][fallback]).sum()} solved)")
+    print(f"max position error of the analytic solutions = {error[~fallback].max(initial=0):.2e}")
@@ -0,0 +1,152 @@
+import argparse
+import importlib
+import numpy as np
+import gurobipy as gp
+from gurobipy import GRB, nlfunc as nl
+
+from arm_ik import DEFAULTS, analytic_ik, pose_margins
+
+# ============================= Explications ============================= #
+# Whole trajectory of the arm of 10_Robotic_Arm.py through T waypoints, as
+# one nonlinear model: the angles are a (T, 2) matrix variable and every
+# constraint of build_arm is written once for the T steps (MVar + nlfunc):
+#   - end-effector (x_t, y_t) and midpoint of link 1 (mx_t, my_t), in x, y >= 0
+#   - midpoint outside the disk (xo, yo, r) at every step
+#   - joint velocity |θ_{t+1} - θ_t| <= max_step for both joints
+#   minimise Σ_t distance(end-effector_t, waypoint_t)
+# The start comes from the analytic inverse kinematics of every waypoint
+# (arm_ik.py), the valid branch closest to the previous step being chosen and
+# the step clipped to the velocity limit; all the variables get a start, so
+# that Gurobi can accept it as an incumbent without completing it. When the
+# waypoints can be tracked exactly, that start has distance 0 and the global
+# solve ends at once, while the cold solve has to find it by branching.
+#
+#   python arm_trajectory.py --steps 5 10 20
+
+arm = importlib.import_module("10_Robotic_Arm")
+
+
+def build_trajectory(m, waypoints, max_step=0.3, L1=arm.L1, L2=arm.L2, xo=arm.xo, yo=arm.yo, r=arm.r,
+                     theta1_limits=(arm.theta1_min, arm.theta1_max),
+                     theta2_limits=(arm.theta2_min, arm.theta2_max)):
+    waypoints = np.asarray(waypoints, dtype=float)
+    T = len(waypoints)
+    lower = np.array([theta1_limits[0], theta2_limits[0]])
+    upper = np.array([theta1_limits[1], theta2_limits[1]])
+
+    # Decision variables, one block per quantity
+    theta = m.addMVar((T, 2), lb=np.tile(lower, (T, 1)), ub=np.tile(upper, (T, 1)), name="theta")
+    x     = m.addMVar(T, lb=0, name="x")
+    y     = m.addMVar(T, lb=0, name="y")
+    mx    = m.addMVar(T, lb=0, name="mx")
+    my    = m.addMVar(T, lb=0, name="my")
+    R     = m.addMVar(T, lb=r, name="R")
+    dist  = m.addMVar(T, lb=0, name="distance")
+
+    m.setObjective(dist.sum(), GRB.MINIMIZE)
+
+    theta1, theta2 = theta[:, 0], theta[:, 1]
+    m.addConstr(x    == L1*nl.cos(theta1) + L2*nl.cos(theta1 + theta2),                          name="position_x")
+    m.addConstr(y    == L1*nl.sin(theta1) + L2*nl.sin(theta1 + theta2),                          name="position_y")
+    m.addConstr(mx   == L1*nl.cos(theta1)/2,                                                     name="middle_x")
+    m.addConstr(my   == L1*nl.sin(theta1)/2,                                                     name="middle_y")
+    m.addConstr(dist == nl.sqrt((x - waypoints[:, 0])**2 + (y - waypoints[:, 1])**2),            name="distance")
+    m.addConstr(R    == nl.sqrt((mx - xo)**2 + (my - yo)**2),                                    name="obstacle")
+
+    # Joint velocity limits between consecutive steps
+    m.addConstr(theta[1:] - theta[:-1] <=  max_step, name="velocity_up")
+    m.addConstr(theta[1:] - theta[:-1] >= -max_step, name="velocity_down")
+    return theta, x, y, mx, my, R, dist
+
+
+def set_start(variables, angles, waypoints, L1=arm.L1, L2=arm.L2, xo=arm.xo, yo=arm.yo):
+    # Start of every variable of build_trajectory from the (T, 2) angles
+    theta, x, y, mx, my, R, dist = variables
+    theta1, theta2 = angles[:, 0], angles[:, 1]
+    ex, ey = L1*np.cos(theta1) + L2*np.cos(theta1 + theta2), L1*np.sin(theta1) + L2*np.sin(theta1 + theta2)
+    hx, hy = L1*np.cos(theta1)/2, L1*np.sin(theta1)/2
+    theta.Start = angles
+    x.Start     = ex
+    y.Start     = ey
+    mx.Start    = hx
+    my.Start    = hy
+    R.Start     = np.hypot(hx - xo, hy - yo)
+    dist.Start  = np.hypot(ex - waypoints[:, 0], ey - waypoints[:, 1])
+
+
+def analytic_seed(waypoints, max_step=np.inf, params=DEFAULTS):
+    """
+    (T, 2) analytic angles of the waypoints, keeping the branch closest to the
+    previous step, each step clipped to the joint velocity limit.
+    """
+    params = {**DEFAULTS, **params}
+    waypoints = np.asarray(waypoints, dtype=float)
+    theta1, theta2, _ = analytic_ik(waypoints[:, 0], waypoints[:, 1], params["L1"], params["L2"])
+    margins = pose_margins(theta1, theta2, **params)
+    seed = np.empty((len(waypoints), 2))
+    previous = None
+    for t in range(len(waypoints)):
+        candidates = np.flatnonzero(margins[t] >= 0)
+        if len(candidates) == 0:
+            candidates = [np.argmax(margins[t])]
+        if previous is None:
+            b = candidates[0]
+        else:
+            b = min(candidates, key=lambda b: abs(theta1[t, b] - previous[0]) + abs(theta2[t, b] - previous[1]))
+        pose = np.array([theta1[t, b], theta2[t, b]])
+        if previous is not None:
+            pose = previous + np.clip(pose - previous, -max_step, max_step)
+        seed[t] = previous = pose
+    return seed
+
+
+def plan(waypoints, max_step=0.3, warm_start=True, time_limit=60, env=None, **params):
+    """
+    Optimal (T, 2) angles for the waypoints, the total distance and the solve
+    time. `params` overrides the arm of DEFAULTS (L1, L2, xo, yo, r, limits),
+    for the model and its warm start alike.
+    """
+    params = {**DEFAULTS, **params}
+    with gp.Model("trajectory", env=env) as m:
+        m.Params.TimeLimit = time_limit
+        variables = build_trajectory(m, waypoints, max_step=max_step, **params)
+        theta = variables[0]
+        if warm_start:
+            set_start(variables, analytic_seed(waypoints, max_step, params), waypoints,
+                      L1=params["L1"], L2=params["L2"], xo=params["xo"], yo=params["yo"])
+        m.optimize()
+        if m.SolCount == 0:
+            raise RuntimeError(f"No trajectory found (status {m.Status})")
+        return theta.X, m.ObjVal, m.Runtime
+
+
+def arc_waypoints(T, radius=1.3, start=0.2, end=0.85):
+    # Arc around the base above the obstacle, reachable elbow up
+    angles = np.linspace(start, end, T)
+    return np.column_stack([radius * np.cos(angles), radius * np.sin(angles)])
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Robot arm trajectory through waypoints")
+    parser.add_argument("--steps", type=int, nargs="+", default=[5, 10, 20])
+    parser.add_argument("--max-step", type=float, default=0.3, help="joint velocity limit (rad per step)")
+    parser.add_argument("--time-limit", type=float, default=60)
+    parser.add_argument("--plot", help="PNG of the last trajectory, e.g. images/robot-arm-trajectory.png")
+    args = parser.parse_args()
+
+    with gp.Env(params={"OutputFlag": 0}) as env:
+        for T in args.steps:
+            waypoints = arc_waypoints(T)
+            _, cold_obj, cold_s = plan(waypoints, args.max_step, warm_start=False, time_limit=args.time_limit, env=env)
+            angles, warm_obj, warm_s = plan(waypoints, args.max_step, warm_start=True, time_limit=args.time_limit, env=env)
+            print(f"T = {T:4d}  cold: {cold_s:8.2f} s (obj {cold_obj:.4g})   "
+                  f"warm: {warm_s:8.2f} s (obj {warm_obj:.4g})")
+
+    if args.plot:
+        import matplotlib.pyplot as plt
+        fig, ax = plt.subplots(figsize=(6, 6))
+        for t, (th1, th2) in enumerate(angles):
+            arm.draw_arm(ax, arm.L1, arm.L2, th1, th2, arm.xo, arm.yo, arm.r, *waypoints[t],
+                         title=f"Robot Arm trajectory (T = {len(angles)})\nobj={warm_obj:.4g}")
+        plt.savefig(args.plot, dpi=100, bbox_inches="tight")
+        plt.close(fig)
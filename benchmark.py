@@ -0,0 +1,218 @@
+import sys
+import json
+import time
+import socket
+import argparse
+import platform
+import importlib
+import subprocess
+import numpy as np
+import gurobipy as gp
+from solution import values
+from datetime import datetime, timezone
+
+# ============================= Explications ============================= #
+# Scaling benchmark of the models of the numbered scripts, on seeded random
+# instances. Every run times four phases separately:
+#   - load     : generation (or reading) of the instance data
+#   - build    : construction of the model, model.update() included
+#   - optimize : model.optimize(), under --time-limit
+#   - extract  : reading the solution values back into NumPy arrays
+# Each run is one JSON line (with the commit, the versions and the host), so
+# result files of two commits can be compared with --compare.
+#
+# --sizes takes "problem=dims" for one problem, or bare dims for every
+# selected problem with that number of dims (the others are skipped).
+#
+#   python benchmark.py --problems knapsack lot_sizing --sizes 1000 10000 -o runs.jsonl
+#   python benchmark.py --problems knapsack commitment --sizes knapsack=1000 commitment=20x96
+#   python benchmark.py --compare base.jsonl runs.jsonl
+
+knapsack    = importlib.import_module("3_Knapsack")
+portfolio   = importlib.import_module("4_portfolio")
+lot_sizing  = importlib.import_module("5_lot_sizing")
+termination = importlib.import_module("7_termination")
+commitment  = importlib.import_module("9_commitment_API")
+
+
+class Problem:
+    def __init__(self, generate, build, sizes):
+        self.generate = generate  # (*dims, seed) -> data
+        self.build    = build     # (model, data) -> variables to extract
+        self.sizes    = sizes     # default list of dims
+        self.ndim     = len(sizes[0])
+
+
+PROBLEMS = {
+    # dims: number of items
+    "knapsack": Problem(
+        lambda n, seed: knapsack.generate_knapsack(n, seed=seed),
+        lambda model, data: [knapsack.build_knapsack_matrix(model, *data)],
+        [(10**3,), (10**4,), (10**5,)]),
+    # dims: number of assets
+    "portfolio": Problem(
+        lambda n, seed: portfolio.generate_portfolio(n, seed=seed),
+        lambda model, data: list(portfolio.build_portfolio(model, *data, risk_model="factor")),
+        [(100,), (500,), (1000,)]),
+    # dims: horizon
+    "lot_sizing": Problem(
+        lambda H, seed: lot_sizing.generate_lot_sizing(H, seed=seed)[1:],
+        lambda model, data: list(lot_sizing.build_lot_sizing_matrix(model, *data)),
+        [(52,), (200,), (1000,)]),
+    # dims: units x periods
+    "commitment": Problem(
+        lambda G, T, seed: commitment.generate_commitment(G, T, seed=seed),
+        lambda model, data: list(commitment.build_commitment(model, *data)),
+        [(3, 24), (20, 96), (100, 96)]),
+    # dims: items x constraints
+    "mkp": Problem(
+        lambda n, m, seed: termination.generate_mkp(n, m, seed=seed),
+        lambda model, data: [termination.build_mkp(model, *data)],
+        [(100, 5), (250, 10), (500, 30)]),
+}
+
+
+def parse_dims(text):
+    # "1000" -> (1000,), "20x96" -> (20, 96)
+    return tuple(int(v) for v in text.lower().split("x"))
+
+
+def parse_size(text):
+    # "commitment=20x96" -> ("commitment", (20, 96)), "1000" -> (None, (1000,))
+    name, _, dims = text.rpartition("=")
+    if name and name not in PROBLEMS:
+        raise argparse.ArgumentTypeError(f"unknown problem {name!r}")
+    try:
+        dims = parse_dims(dims)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"invalid dims {dims!r}, expected e.g. 1000 or 20x96")
+    if name and len(dims) != PROBLEMS[name].ndim:
+        raise argparse.ArgumentTypeError(f"{name} takes {PROBLEMS[name].ndim} dims, got {text!r}")
+    return name or None, dims
+
+
+def sizes_for(name, sizes):
+    """Dims of `name` among the parsed --sizes; its defaults when --sizes is not given."""
+    if sizes is None:
+        return PROBLEMS[name].sizes
+    return [dims for target, dims in sizes
+            if target == name or (target is None and len(dims) == PROBLEMS[name].ndim)]
+
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_once(env, name, dims, seed, time_limit):
+    problem = PROBLEMS[name]
+    phases = {}
+
+    start = time.perf_counter()
+    data = problem.generate(*dims, seed=seed)
+    phases["load"] = time.perf_counter() - start
+
+    with gp.Model(env=env) as model:
+        start = time.perf_counter()
+        variables = problem.build(model, data)
+        model.update()
+        phases["build"] = time.perf_counter() - start
+
+        model.Params.TimeLimit = time_limit
+        start = time.perf_counter()
+        model.optimize()
+        phases["optimize"] = time.perf_counter() - start
+
+        start = time.perf_counter()
+        if model.SolCount:
+            for var in variables:
+                values(model, var)
+        phases["extract"] = time.perf_counter() - start
+
+        return {
+            "problem":   name,
+            "dims":      list(dims),
+            "seed":      seed,
+            "phases":    {k: round(v, 6) for k, v in phases.items()},
+            "status":    model.Status,
+            "obj":       model.ObjVal if model.SolCount else None,
+            "gap":       model.MIPGap if model.IsMIP and model.SolCount else None,
+            "work":      model.Work,
+            "num_vars":  model.NumVars,
+            "num_cons":  model.NumConstrs + model.NumQConstrs + model.NumGenConstrs,
+        }
+
+
+def compare(base_path, new_path, threshold=0.2):
+    """Median time of every (problem, dims, phase) in both files, flagging slowdowns."""
+    def medians(path):
+        runs = {}
+        with open(path, "r") as f:
+            for line in f:
+                run = json.loads(line)
+                for phase, value in run["phases"].items():
+                    runs.setdefault((run["problem"], tuple(run["dims"]), phase), []).append(value)
+        return {key: float(np.median(values)) for key, values in runs.items()}
+
+    base, new = medians(base_path), medians(new_path)
+    regressions = 0
+    for key in sorted(base.keys() & new.keys()):
+        ratio = new[key] / base[key] if base[key] > 0 else float("inf")
+        flag = ""
+        # Below a millisecond the timer noise dominates
+        if ratio > 1 + threshold and new[key] > 1e-3:
+            flag = "  <-- regression"
+            regressions += 1
+        problem, dims, phase = key
+        print(f"{problem:>10} {'x'.join(map(str, dims)):>10} {phase:>8}  "
+              f"{base[key]:10.4f} s -> {new[key]:10.4f} s  x{ratio:6.2f}{flag}")
+    return regressions
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Scaling benchmark of the model scripts")
+    parser.add_argument("--problems", nargs="+", default=list(PROBLEMS), choices=list(PROBLEMS))
+    parser.add_argument("--sizes", nargs="+", type=parse_size,
+                        help="problem=dims (e.g. commitment=20x96), or dims for every problem "
+                             "with that number of dims (default: per problem)")
+    parser.add_argument("--repeats", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--time-limit", type=float, default=60)
+    parser.add_argument("--threads", type=int, default=0)
+    parser.add_argument("-o", "--output", help="JSON lines file, appended to")
+    parser.add_argument("--compare", nargs=2, metavar=("BASE", "NEW"), help="compare two result files")
+    parser.add_argument("--threshold", type=float, default=0.2, help="slowdown flagged as regression")
+    args = parser.parse_args()
+
+    if args.compare:
+        sys.exit(1 if compare(*args.compare, threshold=args.threshold) else 0)
+
+    meta = {
+        "commit":    git_commit(),
+        "date":      datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "host":      socket.gethostname(),
+        "python":    platform.python_version(),
+        "gurobi":    ".".join(map(str, gp.gurobi.version())),
+        "threads":   args.threads,
+        "timelimit": args.time_limit,
+    }
+    output = open(args.output, "a") if args.output else None
+    with gp.Env(params={"OutputFlag": 0, "Threads": args.threads}) as env:
+        for name in args.problems:
+            sizes = sizes_for(name, args.sizes)
+            if not sizes:
+                print(f"{name:>10} skipped: no size with {PROBLEMS[name].ndim} dims", file=sys.stderr)
+            for dims in sizes:
+                for repeat in range(args.repeats):
+                    run = {**meta, **run_once(env, name, dims, args.seed, args.time_limit), "repeat": repeat}
+                    if output:
+                        output.write(json.dumps(run) + "\n")
+                        output.flush()
+                    phases = run["phases"]
+                    print(f"{name:>10} {'x'.join(map(str, dims)):>10} #{repeat}  "
+                          + "  ".join(f"{k} = {v:8.4f} s" for k, v in phases.items()))
+    if output:
+        output.close()
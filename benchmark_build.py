@@ -0,0 +1,93 @@
+import csv
+import time
+import argparse
+import resource
+import importlib
+import tracemalloc
+import gurobipy as gp
+from concurrent.futures import ProcessPoolExecutor
+
+# ============================= Explications ============================= #
+# Model-build benchmark: scalar API (dicts, addVars, one addConstr per row)
+# against the matrix API (NumPy arrays, addMVar, one addConstr per family),
+# for the knapsack of 3_Knapsack.py and the lot sizing of 5_lot_sizing.py.
+#
+# Every case runs in a fresh process, so that the peak memory is its own:
+#   - build_s   : wall time of the build, model.update() included
+#   - rss_delta : growth of the process peak RSS, Gurobi's own memory included
+#   - py_peak   : peak of the Python allocations, only with --trace-python since
+#                 tracemalloc slows the scalar builds down several times
+
+knapsack   = importlib.import_module("3_Knapsack")
+lot_sizing = importlib.import_module("5_lot_sizing")
+
+BUILDERS = {
+    "knapsack":   (knapsack.generate_knapsack, {
+        "dict":   knapsack.build_knapsack_dict,
+        "matrix": knapsack.build_knapsack_matrix,
+    }),
+    "lot_sizing": (lambda H: lot_sizing.generate_lot_sizing(H)[1:], {
+        "loop":   lot_sizing.build_lot_sizing_model,
+        "matrix": lot_sizing.build_lot_sizing_matrix,
+    }),
+}
+
+
+def _peak_rss_mb():
+    # ru_maxrss is in kilobytes on Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def run_case(problem, variant, size, trace_python=False):
+    generate, builders = BUILDERS[problem]
+    data = generate(size)
+    with gp.Env(params={"OutputFlag": 0}) as env, gp.Model(env=env) as model:
+        rss_before = _peak_rss_mb()
+        if trace_python:
+            tracemalloc.start()
+        start = time.perf_counter()
+        builders[variant](model, *data)
+        model.update()
+        build_s = time.perf_counter() - start
+        py_peak = float("nan")
+        if trace_python:
+            _, py_peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+        return {
+            "problem":   problem,
+            "variant":   variant,
+            "size":      size,
+            "num_vars":  model.NumVars,
+            "num_cons":  model.NumConstrs,
+            "build_s":   round(build_s, 4),
+            "py_peak":   round(py_peak / 2**20, 1),
+            "rss_delta": round(_peak_rss_mb() - rss_before, 1),
+        }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Model-build time and memory, scalar vs matrix API")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10**3, 10**4, 10**5, 10**6],
+                        help="number of items / periods")
+    parser.add_argument("--problems", nargs="+", default=list(BUILDERS), choices=list(BUILDERS))
+    parser.add_argument("--trace-python", action="store_true", help="also record the Python peak memory")
+    parser.add_argument("-o", "--output", help="CSV file for the results")
+    args = parser.parse_args()
+
+    results = []
+    for problem in args.problems:
+        for size in args.sizes:
+            for variant in BUILDERS[problem][1]:
+                # One process per case, so that peak memories do not add up
+                with ProcessPoolExecutor(max_workers=1) as pool:
+                    row = pool.submit(run_case, problem, variant, size, args.trace_python).result()
+                results.append(row)
+                print(f"{row['problem']:>10} {row['variant']:>6} {row['size']:>8}  "
+                      f"build = {row['build_s']:8.3f} s   python peak = {row['py_peak']:7.1f} MB   "
+                      f"rss = {row['rss_delta']:7.1f} MB")
+
+    if args.output:
+        with open(args.output, "w", newline="") as f:
+            writer = csv.DictWriter(f, fieldnames=list(results[0]))
+            writer.writeheader()
+            writer.writerows(results)
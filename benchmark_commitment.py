@@ -0,0 +1,86 @@
+import csv
+import time
+import argparse
+import importlib
+import gurobipy as gp
+
+# ============================= Explications ============================= #
+# Build time and relaxation strength of the two formulations of the power
+# limits in 9_commitment_API.build_commitment, against the number of units G
+# and of periods T (672 = one week at 15 minutes):
+#   - "indicator": three indicator constraints per (g,t)
+#   - "linking"  : pi_min * u <= p <= pi_max * u
+# lp_bound is the bound of the continuous relaxation (model.relax(), the
+# indicators are dropped by it), root_bound the bound after the root node
+# (cuts included) and root_s its time, obj / bound / gap the result under
+# --time-limit of a solve from scratch (root included) taking solve_s.
+
+commitment = importlib.import_module("9_commitment_API")
+
+
+def run_case(G, T, formulation, time_limit, seed=0):
+    data = commitment.generate_commitment(G, T, seed=seed, periods_per_day=96)
+    with gp.Env(params={"OutputFlag": 0}) as env, gp.Model(env=env) as model:
+        start = time.perf_counter()
+        commitment.build_commitment(model, *data, formulation=formulation)
+        model.update()
+        build_s = time.perf_counter() - start
+
+        with model.relax() as relaxed:
+            relaxed.optimize()
+            lp_bound = relaxed.ObjVal if relaxed.SolCount else float("nan")
+
+        model.Params.NodeLimit = 0
+        start = time.perf_counter()
+        model.optimize()
+        root_s = time.perf_counter() - start
+        root_bound = model.ObjBound
+
+        # From scratch: without reset() the solve resumes after the root and misses its time
+        model.reset()
+        model.Params.NodeLimit = float("inf")
+        model.Params.TimeLimit = time_limit
+        start = time.perf_counter()
+        model.optimize()
+        solve_s = time.perf_counter() - start
+        return {
+            "G":           G,
+            "T":           T,
+            "formulation": formulation,
+            "num_vars":    model.NumVars,
+            "num_cons":    model.NumConstrs + model.NumGenConstrs,
+            "build_s":     round(build_s, 4),
+            "lp_bound":    lp_bound,
+            "root_bound":  root_bound,
+            "root_s":      round(root_s, 4),
+            "solve_s":     round(solve_s, 4),
+            "obj":         model.ObjVal if model.SolCount else float("nan"),
+            "bound":       model.ObjBound,
+            "gap":         model.MIPGap if model.SolCount else float("nan"),
+        }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Commitment build time and relaxation strength against G and T")
+    parser.add_argument("--units", type=int, nargs="+", default=[10, 50, 100, 500])
+    parser.add_argument("--periods", type=int, nargs="+", default=[96, 672])
+    parser.add_argument("--formulations", nargs="+", default=["indicator", "linking"])
+    parser.add_argument("--time-limit", type=float, default=60)
+    parser.add_argument("-o", "--output", help="CSV file for the results")
+    args = parser.parse_args()
+
+    results = []
+    for G in args.units:
+        for T in args.periods:
+            for formulation in args.formulations:
+                row = run_case(G, T, formulation, args.time_limit)
+                results.append(row)
+                print(f"G = {G:4d} T = {T:4d} {formulation:>9}  build = {row['build_s']:8.3f} s  "
+                      f"LP = {row['lp_bound']:.6g}  root = {row['root_bound']:.6g}  "
+                      f"obj = {row['obj']:.6g}  gap = {row['gap']:.4%}  root: {row['root_s']:8.3f} s  solve = {row['solve_s']:8.3f} s")
+
+    if args.output:
+        with open(args.output, "w", newline="") as f:
+            writer = csv.DictWriter(f, fieldnames=list(results[0]))
+            writer.writeheader()
+            writer.writerows(results)
@@ -0,0 +1,64 @@
+import csv
+import time
+import argparse
+import importlib
+import gurobipy as gp
+
+# ============================= Explications ============================= #
+# Build and solve time of the three risk models of 4_portfolio.py against the
+# number of assets, on random instances with an exact factor structure (so the
+# "dense" and "factor" models have the same optimum).
+
+portfolio = importlib.import_module("4_portfolio")
+
+
+def run_case(n, risk_model, num_factors, time_limit):
+    data = portfolio.generate_portfolio(n, num_factors=num_factors)
+    with gp.Env(params={"OutputFlag": 0}) as env, gp.Model(env=env) as model:
+        model.Params.TimeLimit = time_limit
+        start = time.perf_counter()
+        portfolio.build_portfolio(model, *data, risk_model=risk_model)
+        model.update()
+        build_s = time.perf_counter() - start
+
+        start = time.perf_counter()
+        model.optimize()
+        solve_s = time.perf_counter() - start
+        return {
+            "n":          n,
+            "risk_model": risk_model,
+            "num_qnzs":   model.NumQNZs,
+            "build_s":    round(build_s, 4),
+            "solve_s":    round(solve_s, 4),
+            "status":     model.Status,
+            "obj":        model.ObjVal if model.SolCount else float("nan"),
+            "gap":        model.MIPGap if model.SolCount else float("nan"),
+        }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Portfolio build/solve time against the number of assets")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100, 500, 1000, 2000, 5000])
+    parser.add_argument("--risk-models", nargs="+", default=["quicksum", "dense", "factor"])
+    parser.add_argument("--quicksum-max", type=int, default=1000, help="largest n for the n² quicksum")
+    parser.add_argument("--factors", type=int, default=10)
+    parser.add_argument("--time-limit", type=float, default=60)
+    parser.add_argument("-o", "--output", help="CSV file for the results")
+    args = parser.parse_args()
+
+    results = []
+    for n in args.sizes:
+        for risk_model in args.risk_models:
+            if risk_model == "quicksum" and n > args.quicksum_max:
+                continue
+            row = run_case(n, risk_model, args.factors, args.time_limit)
+            results.append(row)
+            print(f"n = {n:6d} {risk_model:>9}  QNZs = {row['num_qnzs']:10d}  "
+                  f"build = {row['build_s']:8.3f} s  solve = {row['solve_s']:8.3f} s  "
+                  f"obj = {row['obj']:.6g}")
+
+    if args.output:
+        with open(args.output, "w", newline="") as f:
+            writer = csv.DictWriter(f, fieldnames=list(results[0]))
+            writer.writeheader()
+            writer.writerows(results)
@@ -0,0 +1,170 @@
+import json
+import time
+import argparse
+import importlib
+import numpy as np
+import pandas as pd
+import gurobipy as gp
+from gurobipy import GRB
+from pathlib import Path
+
+# ============================= Explications ============================= #
+# Sweep of the bucket of 6_bucket.py over material budgets S and bounds on
+# r, R, h. The geometry is homogeneous: multiplying the lengths by s
+# multiplies the areas by s² and the volume by s³. A design point
+# (S, bounds) is therefore the point (1, bounds / √S) scaled by √S, with
+#     V(S, bounds) = S^{3/2} V(1, bounds / √S)
+# Every point is reduced to this canonical form (S = 1); the key of the
+# memo is the normalised bounds, so that all the points that differ by a
+# pure rescaling share one entry and only the first one is solved.
+#
+# The canonical model is built once: between two solves only the bounds of
+# r, R, h change. Each solve starts from the solution of the nearest solved
+# point (normalised bounds), clipped to the new bounds. The optimal results
+# are appended to a JSON lines file and reloaded by the next sweep; the other
+# ones (time limit, numerical trouble) are solved again by the next sweep.
+#
+#   python bucket_sweep.py --budgets 0.5 1 2 4 --height-max 0.2 0.4 0.6 0.8 1 -o sweep.csv
+
+bucket = importlib.import_module("6_bucket")
+
+LENGTHS  = ("r", "R", "h")
+DEFAULTS = {"r": (0, 1), "R": (0, 1), "h": (0, 1)}
+
+
+def canonical_bounds(S, bounds=None):
+    """Bounds of the point (S, bounds) rescaled to S = 1, as a (3, 2) array."""
+    if S <= 0:
+        raise ValueError(f"The material budget must be positive, got {S}")
+    bounds = {**DEFAULTS, **(bounds or {})}
+    return np.array([bounds[name] for name in LENGTHS], dtype=float) / np.sqrt(S)
+
+
+def canonical_key(normalised, digits=9):
+    # Rounded, so that the rescaled bounds of equal points give the same key
+    return json.dumps(np.round(normalised, digits).tolist())
+
+
+class BucketStore:
+    """Memo of the optimal canonical solutions, {key: {"status", "V", "r", "R", "h"}}, kept in a JSON lines file."""
+
+    def __init__(self, path="bucket_sweep.jsonl"):
+        self.path    = Path(path) if path else None
+        self.entries = {}
+        if self.path and self.path.exists():
+            with open(self.path, "r") as f:
+                for line in f:
+                    record = json.loads(line)
+                    if record["status"] == GRB.OPTIMAL:  # files written before only the optima were kept
+                        self.entries[record.pop("key")] = record
+
+    def __contains__(self, key):
+        return key in self.entries
+
+    def __getitem__(self, key):
+        return self.entries[key]
+
+    def put(self, key, record):
+        self.entries[key] = record
+        if self.path:
+            with open(self.path, "a") as f:
+                f.write(json.dumps({"key": key, **record}) + "\n")
+
+
+class BucketSweep:
+    """
+    Canonical bucket model built once, solved for the design points not in
+    the store. sweep() returns one row per point, scaled back to its S.
+    """
+
+    def __init__(self, store=None, env=None):
+        self.store = store if store is not None else BucketStore(None)
+        self.model = gp.Model("bucket_sweep", env=env)
+        self.vars  = bucket.build_bucket(self.model, S=1.0)
+        self.model.update()
+        self.solves = 0
+        # Normalised bounds and solutions of the solved points, for the warm starts
+        self._points    = [np.array(json.loads(key)).ravel() for key, e in self.store.entries.items() if e["V"] is not None]
+        self._solutions = [[e[name] for name in LENGTHS] + [e["V"]] for e in self.store.entries.values() if e["V"] is not None]
+
+    def close(self):
+        self.model.dispose()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _solve(self, normalised):
+        r, R, h, V, _ = self.vars
+        for var, (lb, ub) in zip((r, R, h), normalised):
+            var.LB, var.UB = lb, ub
+        if self._points:
+            # Start from the nearest solved point, inside the new bounds
+            distance = np.abs(np.nan_to_num(np.array(self._points) - normalised.ravel(), posinf=1e3, neginf=-1e3)).sum(axis=1)
+            start = self._solutions[int(np.argmin(distance))]
+            for var, value, (lb, ub) in zip((r, R, h), start, normalised):
+                var.Start = min(max(value, lb), ub)
+            V.Start = start[3]
+        self.model.optimize()
+        self.solves += 1
+        if self.model.SolCount == 0:
+            return {"status": self.model.Status, "V": None, "r": None, "R": None, "h": None}
+        record = {"status": self.model.Status, "V": V.X, "r": r.X, "R": R.X, "h": h.X}
+        self._points.append(normalised.ravel())
+        self._solutions.append([r.X, R.X, h.X, V.X])
+        return record
+
+    def solve(self, S, bounds=None):
+        """Optimal bucket for the budget S and the bounds: dict of status, V, r, R, h, cached."""
+        normalised = canonical_bounds(S, bounds)
+        key = canonical_key(normalised)
+        cached = key in self.store
+        record = self.store[key] if cached else self._solve(normalised)
+        if not cached and record["status"] == GRB.OPTIMAL:
+            self.store.put(key, record)
+        scale  = np.sqrt(S)
+        result = {"S": S, "status": record["status"], "cached": cached}
+        if record["V"] is None:
+            return {**result, "V": np.nan, "r": np.nan, "R": np.nan, "h": np.nan}
+        return {**result, "V": record["V"] * scale**3,
+                **{name: record[name] * scale for name in LENGTHS}}
+
+    def sweep(self, points):
+        """
+        Solve the design points, a list of (S, bounds). The points are visited
+        in the order of their normalised bounds, so that each warm start comes
+        from a close neighbour. Return a DataFrame in the order of `points`.
+        """
+        normalised = [canonical_bounds(S, bounds).ravel() for S, bounds in points]
+        order = sorted(range(len(points)), key=lambda i: tuple(np.nan_to_num(normalised[i], posinf=1e3)))
+        rows = [None] * len(points)
+        for i in order:
+            S, bounds = points[i]
+            rows[i] = self.solve(S, bounds)
+        return pd.DataFrame(rows)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Bucket volume over material budgets and bounds")
+    parser.add_argument("--budgets", type=float, nargs="+", default=[0.25, 0.5, 1, 2, 4])
+    parser.add_argument("--height-max", type=float, nargs="+", default=list(np.linspace(0.1, 1, 10)),
+                        help="upper bounds of h (at S = 1, rescaled by √S for the other budgets)")
+    parser.add_argument("--store", default="bucket_sweep.jsonl", help="memo of the solved points")
+    parser.add_argument("-o", "--output", help="CSV file for the results")
+    args = parser.parse_args()
+
+    # The bounds follow the budget, so that the points of a column are rescalings of each other
+    points = [(S, {name: (0, np.sqrt(S) * (hmax if name == "h" else 1)) for name in LENGTHS})
+              for hmax in args.height_max for S in args.budgets]
+
+    start = time.perf_counter()
+    with gp.Env(params={"OutputFlag": 0}) as env, BucketSweep(BucketStore(args.store), env) as sweeper:
+        results = sweeper.sweep(points)
+        elapsed = time.perf_counter() - start
+    results.insert(1, "h_max", [bounds["h"][1] for _, bounds in points])
+    print(results.to_string(index=False))
+    print(f"{len(points)} points in {elapsed:.2f} s, {sweeper.solves} solves, {int(results['cached'].sum())} from the memo")
+    if args.output:
+        results.to_csv(args.output, index=False)
@@ -0,0 +1,182 @@
+import time
+import argparse
+import importlib
+import numpy as np
+import gurobipy as gp
+
+# ============================= Explications ============================= #
+# Lagrangian relaxation of the power balance of 9_commitment_API.py:
+#   L(λ) = Σ_t λ_t (L_t - S_t) + Σ_g  min_{u,v,w,p}  Σ_t  u_t (α + β p_t + γ p_t² - λ_t p_t) + δ v_t + ζ w_t
+# With the balance relaxed, the units are independent: for a price λ_t an
+# online unit produces p* = clip((λ_t - β) / 2γ, pmin, pmax), and the best
+# on/off sequence is a two-state dynamic program over the periods, solved for
+# all the units at once in NumPy. L(λ) is a lower bound of the optimal cost.
+#
+# The multipliers follow subgradient steps (Polyak step towards the best
+# upper bound, θ halved when the bound stalls). Every few iterations the
+# commitment u of the subproblems is repaired into a feasible schedule
+# (units switched on / off until each period can meet its demand) and
+# dispatched exactly, which gives an upper bound and the duality gap.
+# Everything is O(G·T) per iteration, so the time is linear in the units.
+#
+#   python commitment_lagrangian.py --units 100 --periods 96
+
+commitment = importlib.import_module("9_commitment_API")
+
+
+def online_cost(λ, pi_min, pi_max, βi, γi):
+    """Optimal output and cost (without α) of every unit online at price λ, arrays (G, T)."""
+    β, γ = βi[:, None], γi[:, None]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        p = np.where(γ > 0, (λ[None, :] - β) / (2 * γ), np.where(λ[None, :] > β, np.inf, -np.inf))
+    p = np.clip(p, pi_min[:, None], pi_max[:, None])
+    return p, β * p + γ * p**2 - λ[None, :] * p
+
+
+def unit_subproblems(λ, init_status, pi_min, pi_max, αi, βi, γi, δi, ζi):
+    """Value of the G subproblems at λ and their optimal (p, u), by a DP over the on/off states."""
+    p, cost = online_cost(λ, pi_min, pi_max, βi, γi)
+    cost += αi[:, None]
+    G, T = cost.shape
+    # Value of being off / on after period t-1, starting from init_status
+    off = np.where(init_status > 0.5, np.inf, 0.0)
+    on  = np.where(init_status > 0.5, 0.0, np.inf)
+    from_on  = np.zeros((G, T), dtype=bool)  # off at t: came from on (shutdown)
+    from_off = np.zeros((G, T), dtype=bool)  # on  at t: came from off (startup)
+    for t in range(T):
+        off_next = np.minimum(off, on + ζi)
+        on_next  = np.minimum(on, off + δi) + cost[:, t]
+        from_on[:, t]  = on + ζi < off
+        from_off[:, t] = off + δi < on
+        off, on = off_next, on_next
+
+    # Backtrack
+    u = np.zeros((G, T))
+    state = on < off
+    value = np.minimum(on, off)
+    for t in range(T - 1, -1, -1):
+        u[:, t] = state
+        state = np.where(state, ~from_off[:, t], from_on[:, t])
+    return value.sum(), p * u, u
+
+
+def economic_dispatch(u, demand, pi_min, pi_max, βi, γi, iterations=100):
+    """Cheapest output for a fixed commitment u: bisection on the price of every period at once."""
+    low  = np.full(len(demand), (βi + 2 * γi * pi_min).min() - 1.0)
+    high = np.full(len(demand), (βi + 2 * γi * pi_max).max() + 1.0)
+    for _ in range(iterations):
+        λ = (low + high) / 2
+        total = (online_cost(λ, pi_min, pi_max, βi, γi)[0] * u).sum(axis=0)
+        low, high = np.where(total < demand, λ, low), np.where(total < demand, high, λ)
+    p = online_cost((low + high) / 2, pi_min, pi_max, βi, γi)[0] * u
+    # Spread the bisection residual on the units strictly inside their limits
+    free = (u > 0) & (p > pi_min[:, None]) & (p < pi_max[:, None])
+    residual = demand - p.sum(axis=0)
+    share = np.where(free.any(axis=0), residual / np.maximum(free.sum(axis=0), 1), 0.0)
+    return np.clip(p + free * share, pi_min[:, None] * u, pi_max[:, None] * u)
+
+
+def repair_commitment(u, demand, pi_min, pi_max, αi, βi, γi):
+    """Switch units on or off until every period satisfies Σ pmin u <= demand <= Σ pmax u."""
+    u = u.copy()
+    # Cheapest units (average cost at full output) are switched on first, dearest off first
+    average = (αi + βi * pi_max + γi * pi_max**2) / pi_max
+    order = np.argsort(average)
+    for t in np.flatnonzero((pi_max @ u < demand) | (pi_min @ u > demand)):
+        column = u[:, t]
+        for g in order[::-1]:
+            if pi_min @ column <= demand[t]:
+                break
+            column[g] = 0
+        # Units switched on only if their minimum output still fits
+        for g in order:
+            if pi_max @ column >= demand[t]:
+                break
+            if not column[g] and pi_min @ column + pi_min[g] <= demand[t]:
+                column[g] = 1
+        if not pi_min @ u[:, t] <= demand[t] <= pi_max @ u[:, t]:
+            raise ValueError(f"No commitment can meet the demand of period {t}")
+    return u
+
+
+def schedule_cost(p, u, init_status, αi, βi, γi, δi, ζi):
+    change = np.diff(np.hstack([np.asarray(init_status, dtype=float)[:, None], u]), axis=1)
+    return float((αi[:, None] * u + βi[:, None] * p + γi[:, None] * p**2).sum()
+                 + (δi[:, None] * (change > 0)).sum() + (ζi[:, None] * (change < 0)).sum())
+
+
+def lagrangian_commitment(data, iterations=300, theta=1.0, patience=10, repair_every=5, tol=1e-4):
+    """
+    Lower bound, feasible schedule and duality gap of the commitment `data`
+    (arguments of build_commitment). Return a dict with lb, ub, gap, p, u, λ
+    and the (iteration, lb, ub) history.
+    """
+    init_status, pi_min, pi_max, αi, βi, γi, δi, ζi, Lt, St = (np.asarray(a, dtype=float) for a in data)
+    demand = Lt - St
+    units  = (init_status, pi_min, pi_max, αi, βi, γi, δi, ζi)
+    # Initial prices: marginal cost of the units at full output
+    λ = np.full(len(demand), float(np.median(βi + 2 * γi * pi_max)))
+    lb, ub = -np.inf, np.inf
+    best_p = best_u = None
+    stall = 0
+    history = []
+    for k in range(iterations):
+        value, p, u = unit_subproblems(λ, *units)
+        dual = value + λ @ demand
+        if dual > lb + 1e-9 * abs(dual):
+            lb, stall = dual, 0
+        else:
+            stall += 1
+            if stall >= patience:
+                theta, stall = theta / 2, 0
+
+        if k % repair_every == 0 or k == iterations - 1:
+            try:
+                u_feasible = repair_commitment(u, demand, pi_min, pi_max, αi, βi, γi)
+            except ValueError:
+                # This commitment could not be repaired: no upper bound this time, lb stays valid
+                u_feasible = None
+            if u_feasible is not None:
+                p_feasible = economic_dispatch(u_feasible, demand, pi_min, pi_max, βi, γi)
+                cost = schedule_cost(p_feasible, u_feasible, init_status, αi, βi, γi, δi, ζi)
+                if cost < ub:
+                    ub, best_p, best_u = cost, p_feasible, u_feasible
+        history.append((k, lb, ub))
+        if np.isfinite(ub) and ub - lb <= tol * abs(ub):
+            break
+
+        subgradient = demand - p.sum(axis=0)
+        norm = subgradient @ subgradient
+        if norm < 1e-12:
+            break
+        # Polyak step towards the best upper bound, or 5% above the dual value before the first one
+        target = ub if np.isfinite(ub) else dual + 0.05 * max(abs(dual), 1.0)
+        λ = λ + theta * (target - dual) / norm * subgradient
+    gap = (ub - lb) / abs(ub) if np.isfinite(ub) else np.inf
+    return {"lb": lb, "ub": ub, "gap": gap, "p": best_p, "u": best_u, "λ": λ,
+            "iterations": len(history), "history": history}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Lagrangian relaxation of the unit commitment")
+    parser.add_argument("--units", type=int, nargs="+", default=[10, 100, 1000])
+    parser.add_argument("--periods", type=int, default=96)
+    parser.add_argument("--iterations", type=int, default=300)
+    parser.add_argument("--mip", action="store_true", help="also solve the monolithic MIQP")
+    parser.add_argument("--time-limit", type=float, default=60, help="of the MIQP")
+    args = parser.parse_args()
+
+    for G in args.units:
+        data = commitment.generate_commitment(G, args.periods)
+        start = time.perf_counter()
+        result = lagrangian_commitment(data, iterations=args.iterations)
+        elapsed = time.perf_counter() - start
+        print(f"G = {G:5d} T = {args.periods:4d}  lagrangian: LB = {result['lb']:.6g}  UB = {result['ub']:.6g}  "
+              f"gap = {result['gap']:.4%}  {result['iterations']} iterations  {elapsed:8.2f} s")
+        if args.mip:
+            with gp.Env(params={"OutputFlag": 0}) as env, gp.Model(env=env) as model:
+                commitment.build_commitment(model, *data, formulation="linking")
+                model.Params.TimeLimit = args.time_limit
+                model.optimize()
+                print(f"{'':16s} MIQP:       LB = {model.ObjBound:.6g}  UB = {model.ObjVal:.6g}  "
+                      f"gap = {model.MIPGap:.4%}  {model.Runtime:8.2f} s")
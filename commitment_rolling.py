@@ -0,0 +1,120 @@
+import csv
+import time
+import argparse
+import importlib
+import numpy as np
+import gurobipy as gp
+
+# ============================= Explications ============================= #
+# Rolling (receding) horizon for the unit commitment of 9_commitment_API.py,
+# for horizons of weeks or months at 15-minute resolution:
+#
+#   window k :  [ start .......... start + step | ....... start + window )
+#                 committed (kept)               overlap (re-optimised)
+#
+# Each window is a full model of `window` periods, but only its first `step`
+# periods are committed. The commitment status at the end of the committed
+# part becomes init_status of the next window, and the solution of the
+# overlap is the MIP start of the first periods of the next window.
+# Only one window model is alive at a time and the committed periods are
+# handed to on_commit(start, p, v, w, u) as they are fixed, so the memory
+# depends on the window size and not on the total horizon.
+#
+#   python commitment_rolling.py --units 2 --days 7 --periods-per-day 96 --window 24 --step 12
+
+commitment = importlib.import_module("9_commitment_API")
+
+
+def commitment_cost(p, v, w, u, αi, βi, γi, δi, ζi):
+    # Objective of build_commitment for given (units x periods) arrays
+    return float((γi[:, None] * p**2 + βi[:, None] * p + αi[:, None] * u
+                  + δi[:, None] * v + ζi[:, None] * w).sum())
+
+
+def rolling_horizon(data, window=96, step=48, time_limit=60, mip_gap=1e-3, env=None, on_commit=None):
+    """
+    Solve the commitment `data` (arguments of build_commitment) window by window.
+    Return the total cost of the committed schedule and, when no on_commit is
+    given, the committed arrays (p, v, w, u) over the whole horizon.
+    """
+    if not 0 < step <= window:
+        raise ValueError("The step must be between 1 and the window size")
+    init_status, pi_min, pi_max, αi, βi, γi, δi, ζi, Lt, St = data
+    Lt, St = np.asarray(Lt, dtype=float), np.asarray(St, dtype=float)
+    num_periods = len(Lt)
+    status = np.asarray(init_status, dtype=float)
+    blocks = []
+    overlap = None  # (p, v, w, u) of the periods after the committed ones
+    total_cost = 0.0
+
+    for start in range(0, num_periods, step):
+        end = min(start + window, num_periods)
+        with gp.Model(f"window_{start}", env=env) as model:
+            model.Params.TimeLimit = time_limit
+            model.Params.MIPGap = mip_gap
+            variables = commitment.build_commitment(model, status, pi_min, pi_max, αi, βi, γi, δi, ζi,
+                                                    Lt[start:end], St[start:end])
+            # Warm start of the periods already optimised by the previous window
+            if overlap is not None:
+                width = min(overlap[0].shape[1], end - start)
+                for var, values in zip(variables, overlap):
+                    var[:, :width].Start = values[:, :width]
+            model.optimize()
+            if model.SolCount == 0:
+                raise RuntimeError(f"No solution for the window starting at period {start} "
+                                   f"(status {model.Status})")
+            values = [var.X for var in variables]
+
+        last = end == num_periods
+        commit = end - start if last else step
+        committed = [a[:, :commit] for a in values]
+        total_cost += commitment_cost(*committed, αi, βi, γi, δi, ζi)
+        if on_commit is not None:
+            on_commit(start, *committed)
+        else:
+            blocks.append(committed)
+        if last:
+            break
+        status = committed[3][:, -1].round()
+        overlap = [a[:, commit:] for a in values]
+
+    if on_commit is not None:
+        return total_cost, None
+    return total_cost, tuple(np.hstack(arrays) for arrays in zip(*blocks))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Rolling horizon unit commitment")
+    parser.add_argument("--units", type=int, default=3)
+    parser.add_argument("--days", type=int, default=7)
+    parser.add_argument("--periods-per-day", type=int, default=96, help="96 for 15 minutes")
+    parser.add_argument("--window", type=int, default=96, help="periods per window")
+    parser.add_argument("--step", type=int, default=48, help="periods committed per window")
+    parser.add_argument("--time-limit", type=float, default=60, help="per window")
+    parser.add_argument("--mip-gap", type=float, default=1e-3)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("-o", "--output", help="CSV file of the committed schedule, written window by window")
+    args = parser.parse_args()
+
+    data = commitment.generate_commitment(args.units, args.days * args.periods_per_day, seed=args.seed,
+                                          periods_per_day=args.periods_per_day)
+
+    output = open(args.output, "w", newline="") if args.output else None
+    writer = csv.writer(output) if output else None
+    if writer:
+        writer.writerow(["period", "unit", "power", "startup", "shutdown", "status"])
+
+    def write_block(start, p, v, w, u):
+        for g in range(p.shape[0]):
+            for t in range(p.shape[1]):
+                writer.writerow([start + t, g, round(p[g, t], 6), int(round(v[g, t])),
+                                 int(round(w[g, t])), int(round(u[g, t]))])
+
+    begin = time.perf_counter()
+    with gp.Env(params={"OutputFlag": 0}) as env:
+        cost, schedule = rolling_horizon(data, args.window, args.step, args.time_limit, args.mip_gap, env=env,
+                                         on_commit=write_block if writer else None)
+    if output:
+        output.close()
+    print(f"{args.units} units, {args.days * args.periods_per_day} periods, window = {args.window}, "
+          f"step = {args.step}: cost = {cost:.2f} in {time.perf_counter() - begin:.2f} s")
@@ -0,0 +1,199 @@
+import os
+import time
+import argparse
+import importlib
+import numpy as np
+import scipy.sparse as sp
+import gurobipy as gp
+from gurobipy import GRB
+from concurrent.futures import ProcessPoolExecutor
+
+from commitment_lagrangian import economic_dispatch, repair_commitment
+
+# ============================= Explications ============================= #
+# Two-stage stochastic unit commitment over K load / solar scenarios:
+#   - first stage : commitment u, startup v, shutdown w (units x periods), shared
+#   - second stage: output p[k] of every scenario k, with its own power balance
+#     and pi_min * u <= p[k] <= pi_max * u
+#   minimise  commitment costs + Σ_k π_k (dispatch cost of scenario k)
+#
+# Two solution methods:
+#   - "extensive": the deterministic equivalent, one MIQP with all the scenarios
+#   - "ph"       : progressive hedging. Each scenario is a deterministic
+#     commitment (build_commitment of 9_commitment_API.py) whose commitment
+#     costs get the PH terms W_k u + ρ/2 ||u - ū||². For binary u the square is
+#     linear, u (1 - 2ū) + ū², so the subproblems stay MIQPs; they are solved
+#     in a process pool (one Env per worker). After the iterations the average
+#     commitment ū is rounded, repaired if a scenario cannot be served, and
+#     evaluated exactly by the dispatch of commitment_lagrangian.py.
+#
+#   python commitment_stochastic.py --units 2 --periods 12 --scenarios 3 10 --method both --workers 1 2
+
+commitment = importlib.import_module("9_commitment_API")
+
+
+def generate_scenarios(Lt, St, num_scenarios, seed=0, load_sd=0.05, solar_sd=0.3):
+    """Equiprobable scenarios around the forecasts: (K, T) loads and solar outputs, probabilities."""
+    rng = np.random.default_rng(seed=seed)
+    Lt, St = np.asarray(Lt, dtype=float), np.asarray(St, dtype=float)
+    loads = Lt * (1 + load_sd * rng.standard_normal((num_scenarios, len(Lt))))
+    solar = St * np.clip(1 + solar_sd * rng.standard_normal((num_scenarios, len(St))), 0, None)
+    return loads, solar, np.full(num_scenarios, 1 / num_scenarios)
+
+
+# ============================= Extensive form ============================= #
+def build_extensive(model, init_status, pi_min, pi_max, αi, βi, γi, δi, ζi, loads, solar, probabilities):
+    K, T = loads.shape
+    G = len(pi_max)
+    n = G * T
+    u = model.addMVar(n,     vtype=GRB.BINARY, name="thermal_unit_comm_status")
+    v = model.addMVar(n,     vtype=GRB.BINARY, name="thermal_unit_startup_status")
+    w = model.addMVar(n,     vtype=GRB.BINARY, name="thermal_unit_shutdown_status")
+    p = model.addMVar(K * n, lb=0,             name="thermal_units_out_power")  # index k*n + g*T + t
+
+    per_gt = lambda values: np.repeat(np.asarray(values, dtype=float), T)
+    weight = np.repeat(probabilities, n)  # π_k of every (k, g, t)
+    model.setObjective(
+        p @ sp.diags(weight * np.tile(per_gt(γi), K)) @ p +
+        (weight * np.tile(per_gt(βi), K)) @ p            +
+        per_gt(αi) @ u + per_gt(δi) @ v + per_gt(ζi) @ w
+    )
+
+    # Power balance of every scenario
+    S = sp.kron(sp.eye(K), sp.kron(np.ones((1, G)), sp.eye(T)), format="csr")
+    model.addConstr(S @ p == (loads - solar).ravel(), name="power_balance")
+
+    # Output limits of every scenario, linked to the shared commitment
+    I = sp.eye(K * n, format="csr")
+    stack = lambda values: sp.kron(np.ones((K, 1)), sp.diags(per_gt(values)), format="csr")
+    model.addConstr(I @ p - stack(pi_min) @ u >= 0, name="min_power")
+    model.addConstr(I @ p - stack(pi_max) @ u <= 0, name="max_power")
+
+    # Logical constraints, as in build_commitment
+    D = sp.kron(sp.eye(G), sp.eye(T) - sp.eye(T, k=-1), format="csr")
+    initial = np.zeros(n)
+    initial[::T] = init_status
+    model.addConstr(D @ u - v + w == initial, name="logical1")
+    model.addConstr(v + w <= 1,               name="logical2")
+    return p, v, w, u
+
+
+def solve_extensive(units, loads, solar, probabilities, time_limit=600, mip_gap=1e-4, env=None):
+    with gp.Model("extensive", env=env) as model:
+        model.Params.TimeLimit = time_limit
+        model.Params.MIPGap = mip_gap
+        *_, u = build_extensive(model, *units, loads, solar, probabilities)
+        model.optimize()
+        if model.SolCount == 0:
+            raise RuntimeError(f"No solution of the extensive form (status {model.Status})")
+        return model.ObjVal, u.X.reshape(len(units[1]), -1).round()
+
+
+# ============================= Progressive hedging ============================= #
+_env = None
+
+
+def _init_worker(threads):
+    # One Env per worker process, kept for all its scenarios
+    global _env
+    _env = gp.Env(params={"OutputFlag": 0, "Threads": threads})
+
+
+def _solve_scenario(job):
+    units, load, solar, penalty, time_limit, mip_gap = job
+    with gp.Model(env=_env) as model:
+        model.Params.TimeLimit = time_limit
+        model.Params.MIPGap = mip_gap
+        *_, u = commitment.build_commitment(model, *units, load, solar, formulation="linking")
+        model.update()
+        # Commitment cost α plus the PH terms, linear in the binary u
+        u.Obj = units[3][:, None] + penalty
+        model.optimize()
+        if model.SolCount == 0:
+            raise RuntimeError(f"No solution of a scenario subproblem (status {model.Status})")
+        return u.X.round()
+
+
+def progressive_hedging(units, loads, solar, probabilities, rho=None, iterations=50, tol=1e-3,
+                        workers=1, time_limit=60, mip_gap=1e-4):
+    """Average commitment ū, rounded, after PH iterations; also return the number of iterations."""
+    K, T = loads.shape
+    G = len(units[2])
+    rho = rho if rho is not None else float(np.mean(units[3]))
+    W = np.zeros((K, G, T))
+    ubar = np.zeros((G, T))
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(1,)) as pool:
+        for it in range(iterations):
+            # No PH term before the first average
+            penalty = W + rho / 2 * (1 - 2 * ubar) if it else W
+            jobs = [(units, loads[k], solar[k], penalty[k], time_limit, mip_gap) for k in range(K)]
+            u = np.array(list(pool.map(_solve_scenario, jobs)))
+            ubar = np.tensordot(probabilities, u, axes=1)
+            disagreement = np.tensordot(probabilities, np.abs(u - ubar).sum(axis=(1, 2)), axes=1)
+            if disagreement <= tol * G * T:
+                break
+            W += rho * (u - ubar)
+    return (ubar >= 0.5).astype(float), it + 1
+
+
+def expected_cost(u, units, loads, solar, probabilities):
+    """
+    Expected cost of the commitment u: it is first repaired so that every
+    scenario can be served, then each scenario is dispatched exactly.
+    """
+    init_status, pi_min, pi_max, αi, βi, γi, δi, ζi = units
+    demands = loads - solar
+    # A unit switched off for one scenario may be needed by another one: a few passes
+    for _ in range(len(demands) + 1):
+        if all(((pi_min @ u <= d + 1e-9) & (pi_max @ u >= d - 1e-9)).all() for d in demands):
+            break
+        for demand in demands:
+            u = repair_commitment(u, demand, pi_min, pi_max, αi, βi, γi)
+    else:
+        raise ValueError("The repaired commitment cannot serve every scenario")
+
+    change = np.diff(np.hstack([init_status[:, None], u]), axis=1)
+    cost = float((αi[:, None] * u).sum() + (δi[:, None] * (change > 0)).sum() + (ζi[:, None] * (change < 0)).sum())
+    for π, demand in zip(probabilities, demands):
+        p = economic_dispatch(u, demand, pi_min, pi_max, βi, γi)
+        cost += π * float((βi[:, None] * p + γi[:, None] * p**2).sum())
+    return cost, u
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Two-stage stochastic unit commitment")
+    parser.add_argument("--units", type=int, default=3)
+    parser.add_argument("--periods", type=int, default=24)
+    parser.add_argument("--scenarios", type=int, nargs="+", default=[10, 50, 100])
+    parser.add_argument("--method", default="both", choices=["extensive", "ph", "both"])
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, os.cpu_count()])
+    parser.add_argument("--rho", type=float, help="PH penalty (default: mean fixed cost α)")
+    parser.add_argument("--iterations", type=int, default=50)
+    parser.add_argument("--time-limit", type=float, default=600)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    *units, Lt, St = (np.asarray(a, dtype=float) for a in commitment.generate_commitment(args.units, args.periods))
+    # Some solar, so that the two sources of uncertainty are present
+    St = 0.15 * Lt.mean() * np.clip(np.sin(np.linspace(-np.pi / 2, 3 * np.pi / 2, args.periods)), 0, None)
+    Lt = Lt + St
+
+    for K in args.scenarios:
+        loads, solar, probabilities = generate_scenarios(Lt, St, K, seed=args.seed)
+        if args.method in ("extensive", "both"):
+            start = time.perf_counter()
+            with gp.Env(params={"OutputFlag": 0}) as env:
+                objective, u = solve_extensive(units, loads, solar, probabilities, args.time_limit, env=env)
+            elapsed = time.perf_counter() - start
+            print(f"K = {K:4d}  extensive           : expected cost = {expected_cost(u, units, loads, solar, probabilities)[0]:.6g}"
+                  f"  (objective {objective:.6g})  {elapsed:8.2f} s")
+        if args.method in ("ph", "both"):
+            for workers in args.workers:
+                start = time.perf_counter()
+                u, iterations = progressive_hedging(units, loads, solar, probabilities, rho=args.rho,
+                                                    iterations=args.iterations, workers=workers,
+                                                    time_limit=args.time_limit)
+                elapsed = time.perf_counter() - start
+                cost, _ = expected_cost(u, units, loads, solar, probabilities)
+                print(f"K = {K:4d}  PH, {workers:2d} workers     : expected cost = {cost:.6g}"
+                      f"  {iterations:3d} iterations  {elapsed:8.2f} s")
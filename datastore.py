@@ -0,0 +1,125 @@
+import json
+import hashlib
+import numpy as np
+from pathlib import Path
+
+# ============================= Explications ============================= #
+# Binary cache of the JSON instances of data/.
+# A JSON file is converted once into a directory "<name>.store/" holding one
+# .npy file per list-valued field (covariance, demand, ...) and a meta.json
+# with the scalar fields, the shapes / dtypes and the content hashes. Later
+# runs memory-map the .npy files (np.load(mmap_mode="r")): no parsing and no
+# copy, the pages are read on demand.
+#
+# The cache is stale when the source JSON changes: its size and mtime are
+# checked first, and its SHA-256 only when they differ (e.g. after a checkout).
+
+META = "meta.json"
+CHUNK = 1 << 20
+
+
+def file_hash(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(CHUNK), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def array_hash(array):
+    return hashlib.sha256(np.ascontiguousarray(array).data).hexdigest()
+
+
+def store_path(path):
+    path = Path(path)
+    return path.with_name(path.stem + ".store")
+
+
+def _source_info(path):
+    stat = Path(path).stat()
+    return {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+
+
+def convert_json(path, store=None):
+    """Convert a JSON instance into its .store directory and return the directory."""
+    store = Path(store) if store is not None else store_path(path)
+    with open(path, "r") as f:
+        data = json.load(f)
+
+    store.mkdir(parents=True, exist_ok=True)
+    meta = {"source": {**_source_info(path), "sha256": file_hash(path)}, "scalars": {}, "arrays": {}}
+    for key, value in data.items():
+        if isinstance(value, list):
+            array = np.asarray(value)
+            np.save(store / f"{key}.npy", array)
+            meta["arrays"][key] = {"shape": list(array.shape), "dtype": str(array.dtype),
+                                   "sha256": array_hash(array)}
+        else:
+            meta["scalars"][key] = value
+    # meta.json is written last: a store without it is incomplete and rebuilt
+    with open(store / META, "w") as f:
+        json.dump(meta, f, indent=2)
+    return store
+
+
+def is_fresh(path, store=None):
+    """True if the store of `path` exists and matches the current JSON content."""
+    store = Path(store) if store is not None else store_path(path)
+    try:
+        with open(store / META, "r") as f:
+            meta = json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return False
+    info = _source_info(path)
+    source = meta["source"]
+    if info["size"] == source["size"] and info["mtime_ns"] == source["mtime_ns"]:
+        return True
+    if info["size"] != source["size"] or file_hash(path) != source["sha256"]:
+        return False
+    # Same content, new mtime: remember it to skip the hash next time
+    source.update(info)
+    with open(store / META, "w") as f:
+        json.dump(meta, f, indent=2)
+    return True
+
+
+def load_store(store, mmap=True, verify=False):
+    """Scalars and arrays of a store, the arrays memory-mapped (read-only) by default."""
+    store = Path(store)
+    with open(store / META, "r") as f:
+        meta = json.load(f)
+    data = dict(meta["scalars"])
+    for key, info in meta["arrays"].items():
+        array = np.load(store / f"{key}.npy", mmap_mode="r" if mmap else None)
+        if verify and array_hash(array) != info["sha256"]:
+            raise ValueError(f"{store / key}.npy does not match its recorded hash")
+        data[key] = array
+    return data
+
+
+def load_instance(path, mmap=True, verify=False):
+    """
+    Drop-in replacement of json.load for the instances of data/: the JSON file is
+    converted on first use (or when it changed) and its store is loaded instead.
+    """
+    store = store_path(path)
+    if not is_fresh(path, store):
+        convert_json(path, store)
+    return load_store(store, mmap=mmap, verify=verify)
+
+
+if __name__ == "__main__":
+    import sys
+    import time
+
+    for path in sys.argv[1:] or ["data/portfolio-example.json", "data/lot_sizing_data.json"]:
+        start = time.perf_counter()
+        with open(path, "r") as f:
+            json.load(f)
+        json_s = time.perf_counter() - start
+
+        load_instance(path)  # converts if needed
+        start = time.perf_counter()
+        load_instance(path)
+        store_s = time.perf_counter() - start
+        print(f"{path}: json.load = {json_s * 1e3:.2f} ms, store = {store_s * 1e3:.2f} ms")
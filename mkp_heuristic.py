@@ -0,0 +1,165 @@
+import argparse
+import numpy as np
+import gurobipy as gp
+from gurobipy import GRB
+from telemetry import ProgressRecorder
+
+# ============================= Explications ============================= #
+# Primal heuristic for the multidimensional knapsack  max c x, A x <= b, x ∈ {0,1}
+# (data/mkp.mps.bz2), run inside the branch-and-bound from a MIPNODE callback:
+#   - greedy construction: the items are taken in the order of the node LP
+#     relaxation (x* = 1 first, then by decreasing x*), ties broken by the
+#     efficiency c_j / sum_i A_ij / b_i, and added while they fit;
+#   - local search: bit flips 0 -> 1 that fit, then the best 1-1 swap
+#     (i out, j in), all the (i, j) pairs being evaluated at once in NumPy;
+#   - the result is handed to Gurobi with cbSetSolution when it beats the
+#     incumbent.
+# The data are read back from the model with model.getA() (a SciPy sparse
+# matrix), so any model of this form can be used.
+#
+#   python mkp_heuristic.py --time-limit 60      (plain Gurobi vs with the heuristic)
+
+
+def extract_mkp(model):
+    """(c, A, b) of a maximisation model with binary variables and <= constraints only."""
+    model.update()
+    if model.ModelSense != GRB.MAXIMIZE:
+        raise ValueError("The MKP heuristic expects a maximisation model")
+    if set(model.getAttr("VType")) != {GRB.BINARY}:
+        raise ValueError("The MKP heuristic expects binary variables only")
+    if set(model.getAttr("Sense", model.getConstrs())) != {GRB.LESS_EQUAL}:
+        raise ValueError("The MKP heuristic expects <= constraints only")
+    c = np.array(model.getAttr("Obj", model.getVars()))
+    A = model.getA().toarray()  # MKP rows are dense
+    b = np.array(model.getAttr("RHS", model.getConstrs()))
+    return c, A, b
+
+
+def efficiency(c, A, b):
+    # Value per unit of weight, each constraint scaled by its capacity
+    return c / np.maximum(A.T @ (1 / b), 1e-12)
+
+
+def greedy(A, b, order):
+    """Add the items of `order` one by one while they fit."""
+    x = np.zeros(A.shape[1], dtype=bool)
+    slack = b.astype(float)
+    for j in order:
+        column = A[:, j]
+        if (column <= slack).all():
+            x[j] = True
+            slack -= column
+    return x
+
+
+def local_search(c, A, b, x, max_moves=1000):
+    """Improve `x` by feasible bit flips 0 -> 1 and best-improvement swaps."""
+    x = x.copy()
+    slack = b - A @ x
+    for _ in range(max_moves):
+        outside = np.flatnonzero(~x)
+        fits = (A[:, outside] <= slack[:, None]).all(axis=0)
+        if fits.any():
+            j = outside[fits][np.argmax(c[outside[fits]])]
+            x[j] = True
+            slack -= A[:, j]
+            continue
+
+        inside = np.flatnonzero(x)
+        gain = c[outside][None, :] - c[inside][:, None]
+        # Only the pairs with a positive gain are checked for feasibility
+        rows, cols = np.nonzero(gain > 0)
+        if len(rows) == 0:
+            break
+        i, j = inside[rows], outside[cols]
+        feasible = (slack[:, None] + A[:, i] - A[:, j] >= 0).all(axis=0)
+        if not feasible.any():
+            break
+        best = np.flatnonzero(feasible)[np.argmax(gain[rows, cols][feasible])]
+        x[i[best]], x[j[best]] = False, True
+        slack += A[:, i[best]] - A[:, j[best]]
+    return x
+
+
+class HeuristicData:
+    def __init__(self, variables, c, A, b, frequency=100):
+        self.variables  = variables
+        self.c, self.A, self.b = c, A, b
+        self.efficiency = efficiency(c, A, b)
+        self.frequency  = frequency  # nodes between two runs of the heuristic
+        self.next_node  = 0
+        self.calls      = 0
+        self.improved   = 0
+
+
+def heuristic_callback(model, where, *, cbdata):
+    if where != GRB.Callback.MIPNODE:
+        return
+    if model.cbGet(GRB.Callback.MIPNODE_STATUS) != GRB.OPTIMAL:
+        return
+    nodes = model.cbGet(GRB.Callback.MIPNODE_NODCNT)
+    if nodes < cbdata.next_node:
+        return
+    cbdata.next_node = nodes + cbdata.frequency
+
+    relaxation = np.array(model.cbGetNodeRel(cbdata.variables))
+    order = np.lexsort((-cbdata.efficiency, -relaxation))
+    x = local_search(cbdata.c, cbdata.A, cbdata.b, greedy(cbdata.A, cbdata.b, order))
+    cbdata.calls += 1
+    if cbdata.c @ x > model.cbGet(GRB.Callback.MIPNODE_OBJBST) + 1e-6:
+        model.cbSetSolution(cbdata.variables, x.astype(float).tolist())
+        model.cbUseSolution()
+        cbdata.improved += 1
+
+
+def solve(path, heuristic=True, time_limit=60, frequency=100, seed=0):
+    """Solve the model file `path` and return its progress samples and final statistics."""
+    with gp.Env(params={"OutputFlag": 0}) as env, gp.read(path, env=env) as model:
+        model.Params.TimeLimit = time_limit
+        model.Params.Seed = seed
+        recorder = ProgressRecorder(interval=0.5)
+        record = recorder.attach(model)
+        if heuristic:
+            cbdata = HeuristicData(model.getVars(), *extract_mkp(model), frequency=frequency)
+
+            def callback(model, where):
+                record(model, where)
+                heuristic_callback(model, where, cbdata=cbdata)
+        else:
+            callback = record
+        model.optimize(callback)
+        return recorder.samples(), {
+            "obj":      model.ObjVal if model.SolCount else float("nan"),
+            "bound":    model.ObjBound,
+            "gap":      model.MIPGap if model.SolCount else float("inf"),
+            "runtime":  model.Runtime,
+            "improved": cbdata.improved if heuristic else 0,
+        }
+
+
+def time_to_target(samples, target):
+    # Runtime of the first incumbent at least as good as `target` (maximisation)
+    for sample in samples:
+        if sample.incumbent >= target and sample.incumbent < GRB.INFINITY:
+            return sample.time
+    return float("inf")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="NumPy primal heuristic for the MKP in a MIPNODE callback")
+    parser.add_argument("model", nargs="?", default="data/mkp.mps.bz2")
+    parser.add_argument("--time-limit", type=float, default=60)
+    parser.add_argument("--frequency", type=int, default=100, help="nodes between two runs of the heuristic")
+    parser.add_argument("--good", type=float, default=5e-3,
+                        help="an incumbent is good within this relative distance of the best one found")
+    args = parser.parse_args()
+
+    plain, plain_stats = solve(args.model, heuristic=False, time_limit=args.time_limit)
+    heur,  heur_stats  = solve(args.model, heuristic=True, time_limit=args.time_limit, frequency=args.frequency)
+
+    target = (1 - args.good) * max(plain_stats["obj"], heur_stats["obj"])
+    print(f"Good incumbent: >= {target:.1f}")
+    for name, samples, stats in (("plain", plain, plain_stats), ("heuristic", heur, heur_stats)):
+        print(f"{name:>10}: first good incumbent at {time_to_target(samples, target):7.2f} s, "
+              f"obj = {stats['obj']:.1f}, final gap = {stats['gap']:.4%}, "
+              f"{stats['improved']} heuristic solutions used")
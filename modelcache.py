@@ -0,0 +1,229 @@
+import json
+import time
+import shutil
+import hashlib
+import tempfile
+import numpy as np
+import gurobipy as gp
+from pathlib import Path
+from datastore import file_hash
+
+# ============================= Explications ============================= #
+# On-disk cache of built models and of their best known solution.
+# An entry "<cache>/<key>/" holds:
+#   - model.mps : the model, uncompressed (no bz2 decompression nor rebuild on reload)
+#   - best.sol  : the best solution found so far, read back as MIP start
+#   - handles.npz: positions in model.getVars() of the variables returned by
+#     the builder (MVar, tupledict, list or Var), the kinds / shapes / keys
+#     being in meta.json. A model read back from model.mps has no Python
+#     handles: they are rebuilt from these positions (the MPS file keeps the
+#     order of the variables), so get_or_build returns the same handles
+#     whether the model was built or reloaded, ready for Start values.
+#   - meta.json : objective of best.sol, size and last use of the entry
+# The key is a fingerprint of the instance data and of the build parameters
+# (fingerprint) or of a model file (file_fingerprint). When the entries
+# exceed max_bytes, the least recently used ones are removed. store() writes
+# an entry in a temporary ".<key>.*" directory moved into place once complete,
+# so that a concurrent evict never sees it half written; the leftovers of a
+# crash (temporary directories, entries without meta.json) are removed once
+# they are older than GRACE seconds.
+#
+#   cache = ModelCache("model_cache")
+#   key   = fingerprint("knapsack", values, weights, capacity)
+#   model, x = cache.get_or_build(key, lambda model: build_knapsack_matrix(model, values, weights, capacity), env)
+#   model.optimize()
+#   cache.save_solution(key, model)
+
+META    = "meta.json"
+HANDLES = "handles.npz"
+GRACE   = 3600  # seconds before an incomplete entry is taken for a crash leftover
+
+
+def fingerprint(name, *data, **params):
+    """Key of a model built by `name` from the arrays / scalars `data` with `params`."""
+    digest = hashlib.sha256(name.encode())
+    for value in data:
+        array = np.ascontiguousarray(value)
+        digest.update(f"{array.dtype}{array.shape}".encode())
+        digest.update(array.data if array.dtype != object else repr(value).encode())
+    digest.update(json.dumps(params, sort_keys=True, default=str).encode())
+    return digest.hexdigest()[:32]
+
+
+def file_fingerprint(path, **params):
+    """Key of a model read from the file `path`."""
+    return fingerprint("file", file_hash(path), **params)
+
+
+def _is_var_list(handles):
+    return isinstance(handles, list) and all(isinstance(v, gp.Var) for v in handles)
+
+
+def _as_list(handles):
+    # A builder returns one handle or a tuple of handles; a list of Var is one handle
+    return [handles] if not isinstance(handles, (tuple, list)) or _is_var_list(handles) else list(handles)
+
+
+def _describe(handle):
+    # (spec, positions in model.getVars()) of one handle
+    if isinstance(handle, gp.MVar):
+        variables = handle.reshape(-1).tolist()
+        spec = {"kind": "mvar", "shape": list(handle.shape)}
+    elif isinstance(handle, dict):
+        variables = list(handle.values())
+        spec = {"kind": "tupledict", "keys": [list(k) if isinstance(k, tuple) else k for k in handle.keys()]}
+    elif isinstance(handle, gp.Var):
+        variables = [handle]
+        spec = {"kind": "var"}
+    elif _is_var_list(handle):
+        variables = handle
+        spec = {"kind": "list"}
+    else:
+        raise TypeError(f"Cannot cache a handle of type {type(handle).__name__}")
+    return spec, np.array([v.index for v in variables], dtype=np.int64)
+
+
+def _rebuild(spec, variables):
+    if spec["kind"] == "mvar":
+        return gp.MVar.fromlist(variables).reshape(spec["shape"])
+    if spec["kind"] == "tupledict":
+        return gp.tupledict(zip((tuple(k) if isinstance(k, list) else k for k in spec["keys"]), variables))
+    if spec["kind"] == "var":
+        return variables[0]
+    return variables
+
+
+class ModelCache:
+    def __init__(self, directory="model_cache", max_bytes=1 << 30):
+        self.directory = Path(directory)
+        self.max_bytes = max_bytes
+        self.directory.mkdir(parents=True, exist_ok=True)
+
+    def _entry(self, key):
+        return self.directory / key
+
+    def _read_meta(self, key):
+        try:
+            with open(self._entry(key) / META, "r") as f:
+                return json.load(f)
+        except (OSError, json.JSONDecodeError):
+            return None
+
+    def _write_meta(self, key, meta, entry=None):
+        entry = entry or self._entry(key)
+        meta["size"] = sum(p.stat().st_size for p in entry.iterdir() if p.name != META)
+        # meta.json is replaced atomically: an entry without it is incomplete
+        tmp = entry / (META + ".tmp")
+        with open(tmp, "w") as f:
+            json.dump(meta, f)
+        tmp.replace(entry / META)
+
+    def load(self, key, env=None):
+        """Cached model of `key` (with its best solution as Start), or None."""
+        meta = self._read_meta(key)
+        if meta is None:
+            return None
+        entry = self._entry(key)
+        model = gp.read(str(entry / "model.mps"), env=env)
+        if meta.get("objective") is not None:
+            model.read(str(entry / "best.sol"))
+        meta["last_used"] = time.time()
+        self._write_meta(key, meta)
+        return model
+
+    def store(self, key, model, handles=None):
+        model.update()
+        tmp = Path(tempfile.mkdtemp(prefix=f".{key}.", dir=self.directory))
+        try:
+            model.write(str(tmp / "model.mps"))
+            meta = {"objective": None, "last_used": time.time()}
+            if handles is not None:
+                specs, positions = zip(*(_describe(h) for h in _as_list(handles)))
+                np.savez(tmp / HANDLES, *positions)
+                meta["handles"] = {"single": not isinstance(handles, (tuple, list)) or _is_var_list(handles),
+                                   "specs": list(specs)}
+            self._write_meta(key, meta, entry=tmp)
+            entry = self._entry(key)
+            if entry.exists():
+                # A directory is only replaced when empty: move the old entry aside first
+                old = Path(tempfile.mkdtemp(prefix=f".{key}.", dir=self.directory))
+                entry.replace(old / key)
+                shutil.rmtree(old, ignore_errors=True)
+            tmp.replace(entry)
+        except BaseException:
+            shutil.rmtree(tmp, ignore_errors=True)
+            raise
+        self.evict(keep=key)
+
+    def handles(self, key, model):
+        """Handles stored with the entry `key`, rebuilt on the variables of `model`, or None."""
+        meta = self._read_meta(key)
+        if meta is None or "handles" not in meta:
+            return None
+        variables = model.getVars()
+        with np.load(self._entry(key) / HANDLES) as data:
+            rebuilt = [_rebuild(spec, [variables[i] for i in data[f"arr_{n}"]])
+                       for n, spec in enumerate(meta["handles"]["specs"])]
+        return rebuilt[0] if meta["handles"]["single"] else tuple(rebuilt)
+
+    def save_solution(self, key, model):
+        """Keep the solution of `model` if it improves the cached one; return True if kept."""
+        meta = self._read_meta(key)
+        if meta is None or model.SolCount == 0:
+            return False
+        best = meta["objective"]
+        if best is not None and model.ModelSense * (model.ObjVal - best) >= 0:
+            return False
+        model.write(str(self._entry(key) / "best.sol"))
+        meta["objective"] = model.ObjVal
+        self._write_meta(key, meta)
+        return True
+
+    def get_or_build(self, key, build, env=None):
+        """
+        Cached model of `key`, or a new model built by build(model) and stored.
+        Return (model, handles): the return value of build, rebuilt by position
+        when the model comes from the cache.
+        """
+        model = self.load(key, env)
+        if model is not None:
+            return model, self.handles(key, model)
+        model = gp.Model(env=env)
+        handles = build(model)
+        self.store(key, model, handles)
+        return model, handles
+
+    def read(self, path, env=None, **params):
+        """gp.read(path) through the cache, e.g. for the compressed MPS files of data/."""
+        key = file_fingerprint(path, **params)
+        model = self.load(key, env)
+        if model is None:
+            model = gp.read(str(path), env=env)
+            self.store(key, model)
+        return key, model
+
+    def evict(self, keep=None):
+        """Remove the least recently used entries (but `keep`) until the cache fits in max_bytes."""
+        entries = []
+        for entry in self.directory.iterdir():
+            if entry.name == keep or not entry.is_dir():
+                continue
+            try:
+                meta = None if entry.name.startswith(".") else self._read_meta(entry.name)
+                if meta is None:
+                    # Temporary directory of store(), or entry without meta.json: removed
+                    # only when too old to be a store() still in progress
+                    if time.time() - entry.stat().st_mtime > GRACE:
+                        shutil.rmtree(entry, ignore_errors=True)
+                    continue
+                entries.append((meta["last_used"], meta["size"] + (entry / META).stat().st_size, entry))
+            except (OSError, KeyError):
+                continue
+        total = sum(size for _, size, _ in entries)
+        if keep is not None and (self._entry(keep) / META).exists():
+            total += self._read_meta(keep)["size"]
+        for _, size, entry in sorted(entries, key=lambda e: e[0]):
+            if total <= self.max_bytes:
+                break
+            shutil.rmtree(entry)
+            total -= size
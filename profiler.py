@@ -0,0 +1,102 @@
+import os
+import json
+import time
+import tracemalloc
+from contextlib import contextmanager, nullcontext
+
+# ============================= Explications ============================= #
+# Opt-in profiler of the phases of a run (data load, expression building,
+# optimize, results). Every phase records
+#   - wall : time.perf_counter()     cpu : time.process_time()
+#   - peak : peak Python memory of the phase (tracemalloc; the memory of the
+#            Gurobi library itself is not traced)
+#   - the size of the model, when the phase is given one: NumVars, NumConstrs,
+#     NumQNZs, NumGenConstrs, after model.update() (the pending changes of the
+#     lazy update are then counted in the phase that made them, not in optimize)
+# Phases may be nested; the peak of a phase includes the peaks of its children.
+# A disabled profiler costs nothing: phase() is then a nullcontext.
+#
+#   profiler = PhaseProfiler.from_env()       # PROFILE=1 or PROFILE=run.json
+#   with profiler.phase("build", model):
+#       build_portfolio(model, *data)
+#   profiler.report()
+
+MODEL_STATS = ("NumVars", "NumConstrs", "NumQNZs", "NumGenConstrs")
+
+
+class PhaseProfiler:
+    def __init__(self, enabled=True, memory=True, path=None):
+        self.enabled = enabled
+        self.memory  = memory and enabled
+        self.path    = path     # JSON output of report(), the table is printed when None
+        self.records = []
+        self._stack  = []       # peaks of the children of the open phases
+        if self.memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+
+    @classmethod
+    def from_env(cls, variable="PROFILE"):
+        """Enabled when the variable is set: "1" prints the table, a path gets the JSON."""
+        value = os.environ.get(variable, "")
+        return cls(enabled=value not in ("", "0"), path=value if value not in ("", "0", "1") else None)
+
+    def phase(self, name, model=None):
+        if not self.enabled:
+            return nullcontext()
+        return self._phase(name, model)
+
+    @contextmanager
+    def _phase(self, name, model):
+        if self.memory:
+            # The peak so far belongs to the enclosing phase
+            if self._stack:
+                self._stack[-1] = max(self._stack[-1], tracemalloc.get_traced_memory()[1])
+            tracemalloc.reset_peak()
+            start_memory = tracemalloc.get_traced_memory()[0]
+        self._stack.append(0)
+        record = {"phase": name, "depth": len(self._stack) - 1}
+        self.records.append(record)  # in the order of the starts
+        wall, cpu = time.perf_counter(), time.process_time()
+        try:
+            yield record
+        finally:
+            if model is not None:
+                model.update()
+            record["wall_s"] = time.perf_counter() - wall
+            record["cpu_s"]  = time.process_time() - cpu
+            children_peak = self._stack.pop()
+            if self.memory:
+                current, peak = tracemalloc.get_traced_memory()
+                peak = max(peak, children_peak)
+                record["peak_mb"]  = (peak - start_memory) / 2**20
+                record["delta_mb"] = (current - start_memory) / 2**20
+                if self._stack:
+                    self._stack[-1] = max(self._stack[-1], peak)
+            if model is not None:
+                record.update({stat: getattr(model, stat) for stat in MODEL_STATS})
+
+    def summary(self):
+        """Table of the phases, one line each, the children indented."""
+        columns = ["wall_s", "cpu_s", "peak_mb", "delta_mb", *MODEL_STATS]
+        lines = [f"{'phase':24s}" + "".join(f"{c:>14s}" for c in columns)]
+        for record in self.records:
+            cells = []
+            for c in columns:
+                value = record.get(c)
+                cells.append(f"{'':>14s}" if value is None else
+                             f"{value:14d}" if isinstance(value, int) else f"{value:14.4f}")
+            lines.append(f"{'  ' * record['depth'] + record['phase']:24s}" + "".join(cells))
+        return "\n".join(lines)
+
+    def to_json(self, **run):
+        return json.dumps({**run, "phases": self.records})
+
+    def report(self, **run):
+        """Print the table, or append the JSON line of the run (with the `run` fields) to self.path."""
+        if not self.enabled:
+            return
+        if self.path:
+            with open(self.path, "a") as f:
+                f.write(self.to_json(**run) + "\n")
+        else:
+            print(self.summary())
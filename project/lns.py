@@ -0,0 +1,206 @@
+import os
+import time
+import argparse
+import numpy as np
+import gurobipy as gp
+from gurobipy import GRB
+from concurrent.futures import ProcessPoolExecutor
+
+from slideshow import solve, transition_score, write_submission
+from scoring import Slideshow, local_search, validate_slides
+
+# ============================= Explications ============================= #
+# Large neighbourhood search over windows of k consecutive slides.
+# The photos of a window (its H photos and the V photos of its pairs) are
+# re-assigned to the k positions of the window by a small MIP, which chooses
+# both the order of the slides and the pairing of the vertical photos. The
+# slides just before and after the window are fixed.
+#
+#   a[q,p] ∈ {0,1} : photo q is placed on position p
+#   z[p,t] ∈ {0,1} : the slide at position p carries tag t   (z = OR of its photos)
+#   c[p,t] ∈ {0,1} : tag t is carried by both slides p and p+1 (c = z[p] AND z[p+1])
+#   s[e]   ≥ 0     : score of transition e = min(common, |A| - common, |B| - common)
+#
+# Windows separated by at least one slide do not interact, so each round
+# solves a batch of such windows in a process pool, one Gurobi Env per worker.
+
+# ============================= Window model ============================= #
+def solve_window(photo_tags, vertical, start, left=(), right=(), env=None, time_limit=10):
+    """
+    Best arrangement of the photos `photo_tags` (list of tag tuples) into slides.
+    `start` is the current arrangement (list of tuples of local photo indices),
+    used as MIP start; `left` / `right` are the tags of the fixed neighbours.
+    Return the best arrangement found and its score, boundary transitions included.
+    """
+    num_photos = len(photo_tags)
+    num_slides = len(start)
+    # Local numbering of the tags of the window
+    local = {}
+    for tags in (left, right, *photo_tags):
+        for t in tags:
+            local.setdefault(t, len(local))
+    T = len(local)
+    P = np.zeros((num_photos, T))
+    for q, tags in enumerate(photo_tags):
+        P[q, [local[t] for t in tags]] = 1
+    L = np.zeros(T); L[[local[t] for t in left]]  = 1
+    R = np.zeros(T); R[[local[t] for t in right]] = 1
+    is_v = np.array(vertical, dtype=float)
+
+    with gp.Model(name="slideshow_window", env=env) as model:
+        model.Params.TimeLimit = time_limit
+        a = model.addMVar((num_photos, num_slides), vtype=GRB.BINARY, name="a")
+        z = model.addMVar((num_slides, T),          vtype=GRB.BINARY, name="z")
+        c = model.addMVar((num_slides - 1, T),      vtype=GRB.BINARY, name="c")
+
+        # Every photo is used once, a slide is one H photo or two V photos
+        model.addConstr(a.sum(axis=1) == 1, name="photo_used")
+        model.addConstr(((2 - is_v)[:, None] * a).sum(axis=0) == 2, name="slide_kind")
+
+        # z[p,t] = OR of the photos placed on p carrying t
+        for q in range(num_photos):
+            tags = np.flatnonzero(P[q])
+            model.addConstr(z[:, tags] >= a[q, :][:, None], name=f"tag_on_{q}")
+        model.addConstr(z <= a.T @ P, name="tag_off")
+
+        # c[p,t] = z[p,t] AND z[p+1,t]
+        model.addConstr(c <= z[:-1, :], name="common_left")
+        model.addConstr(c <= z[1:, :],  name="common_right")
+        model.addConstr(c >= z[:-1, :] + z[1:, :] - 1, name="common_both")
+
+        size   = z.sum(axis=1)
+        common = c.sum(axis=1)
+        s = model.addMVar(num_slides - 1, lb=0, name="s")
+        model.addConstr(s <= common,              name="score_common")
+        model.addConstr(s <= size[:-1] - common,  name="score_left")
+        model.addConstr(s <= size[1:]  - common,  name="score_right")
+        objective = s.sum()
+
+        # Transitions with the fixed neighbours, z @ L is the number of common tags
+        for name, row, border in (("left", 0, L), ("right", num_slides - 1, R)):
+            if border.sum() == 0:
+                continue
+            shared = z[row, :] @ border
+            sb = model.addVar(lb=0, name=f"s_{name}")
+            model.addConstr(sb <= shared,                name=f"score_{name}_common")
+            model.addConstr(sb <= border.sum() - shared, name=f"score_{name}_border")
+            model.addConstr(sb <= size[row] - shared,    name=f"score_{name}_slide")
+            objective += sb
+
+        model.setObjective(objective, GRB.MAXIMIZE)
+
+        # MIP start: the current arrangement of the window
+        a_start = np.zeros((num_photos, num_slides))
+        for p, slide in enumerate(start):
+            a_start[list(slide), p] = 1
+        a.Start = a_start
+
+        model.optimize()
+        if model.SolCount == 0:
+            return list(start), None
+        placed = a.X > 0.5
+        slides = [tuple(np.flatnonzero(placed[:, p]).tolist()) for p in range(num_slides)]
+        return slides, round(model.ObjVal)
+
+
+# ============================= Process pool ============================= #
+_env = None
+
+
+def _init_worker(threads):
+    # One Env per worker process, kept for all its windows
+    global _env
+    _env = gp.Env(params={"OutputFlag": 0, "Threads": threads})
+
+
+def _solve_window_job(job):
+    first, photos, photo_tags, vertical, start, left, right, time_limit = job
+    slides, score = solve_window(photo_tags, vertical, start, left, right, env=_env, time_limit=time_limit)
+    return first, [tuple(photos[q] for q in slide) for slide in slides], score
+
+
+def window_jobs(show, instance, k, offset, time_limit):
+    """One job per window [first, first + k), consecutive windows spaced by one fixed slide."""
+    n = len(show)
+    jobs = []
+    for first in range(offset, n - 1, k + 1):
+        last = min(first + k, n)
+        if last - first < 2:
+            continue
+        photos = [p for slide in show.slides[first:last] for p in slide]
+        local  = {p: q for q, p in enumerate(photos)}
+        start  = [tuple(local[p] for p in slide) for slide in show.slides[first:last]]
+        left   = tuple(show.tags[first - 1]) if first > 0 else ()
+        right  = tuple(show.tags[last]) if last < n else ()
+        jobs.append((first, photos, [instance.tags[p] for p in photos],
+                     [instance.vertical[p] for p in photos], start, left, right, time_limit))
+    return jobs
+
+
+def large_neighbourhood_search(show, instance, k=5, rounds=10, workers=None, time_limit=10, seed=0):
+    """Improve `show` in place, returning the total gain over all the rounds."""
+    workers = workers or os.cpu_count()
+    rng  = np.random.default_rng(seed)
+    gain = 0
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(1,)) as pool:
+        for r in range(rounds):
+            jobs = window_jobs(show, instance, k, int(rng.integers(k + 1)), time_limit)
+            # Large chunks keep the pickling overhead small when windows are cheap
+            chunksize = max(1, len(jobs) // (4 * workers))
+            round_gain = 0
+            for first, slides, _ in pool.map(_solve_window_job, jobs, chunksize=chunksize):
+                round_gain += splice(show, first, slides)
+            gain += round_gain
+            print(f"Round {r}: {len(jobs)} windows, gain = {round_gain}, score = {show.score}")
+    return gain
+
+
+def _window_score(show, first, last):
+    t = show.tags
+    return sum(transition_score(t[e], t[e + 1]) for e in range(max(first - 1, 0), min(last, len(t) - 1)))
+
+
+def splice(show, first, slides):
+    """Put `slides` at position `first` if this improves the slideshow, return the gain."""
+    last   = first + len(slides)
+    before = show.slides[first:last], show.tags[first:last]
+    old    = _window_score(show, first, last)
+    show.slides[first:last] = slides
+    show.tags[first:last]   = [frozenset().union(*(show.photo_tags[p] for p in s)) for s in slides]
+    delta = _window_score(show, first, last) - old
+    if delta <= 0:
+        show.slides[first:last], show.tags[first:last] = before
+        return 0
+    show.score += delta
+    return delta
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Gurobi LNS over windows of a slideshow")
+    parser.add_argument("instance", help="input file, e.g. project/PetPics-20.txt")
+    parser.add_argument("-k", type=int, default=5, help="slides per window")
+    parser.add_argument("--rounds", type=int, default=10)
+    parser.add_argument("--workers", type=int, default=None, help="processes (default: all cores)")
+    parser.add_argument("--time-limit", type=float, default=10, help="seconds per window")
+    parser.add_argument("--improve", type=float, default=0, help="seconds of local search first")
+    parser.add_argument("-o", "--output", help="submission file to write")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    instance, greedy_slides, _, order = solve(args.instance)
+    show = Slideshow(instance, [greedy_slides[s] for s in order])
+    print(f"Greedy score = {show.score}")
+    if args.improve > 0:
+        local_search(show, time_limit=args.improve)
+        print(f"Local search score = {show.score}")
+    large_neighbourhood_search(show, instance, k=args.k, rounds=args.rounds,
+                               workers=args.workers, time_limit=args.time_limit)
+
+    validate_slides(instance, show.slides)
+    assert show.score == show.full_score()
+    print("===================================")
+    print(f"Score \t= {show.score}")
+    print(f"Temps \t= {time.perf_counter() - start:.2f} seconds")
+    print("===================================")
+    if args.output:
+        write_submission(args.output, show.slides, range(len(show.slides)))
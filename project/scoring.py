@@ -0,0 +1,227 @@
+import time
+import random
+import argparse
+
+from slideshow import read_instance, solve, transition_score, write_submission
+
+# ============================= Explications ============================= #
+# Scoring, validation and local search for the Hash Code 2019 slideshow.
+#
+# A `Slideshow` stores its slides by position, each slide being a tuple of photo
+# ids together with the frozenset of its interned tag ids. Since only the
+# transitions touching a modified position change, every move below is scored
+# in O(tags) by looking at, at most, four transitions:
+#   - swap(i, j)         : exchange the slides at positions i and j
+#   - reverse(i, j)      : 2-opt, reverse the slides between positions i and j
+#   - repair(i, j, cross): exchange one vertical photo between the pairs at i and j
+
+# ============================= Slideshow ============================= #
+class Slideshow:
+    def __init__(self, instance, slides):
+        self.photo_tags = [frozenset(t) for t in instance.tags]
+        self.slides     = list(slides)
+        self.tags       = [frozenset().union(*(self.photo_tags[p] for p in s)) for s in self.slides]
+        self.score      = self.full_score()
+
+    def __len__(self):
+        return len(self.slides)
+
+    def full_score(self):
+        t = self.tags
+        return sum(transition_score(t[k], t[k + 1]) for k in range(len(t) - 1))
+
+    # ---------- Deltas ---------- #
+    def delta_swap(self, i, j):
+        if i > j:
+            i, j = j, i
+        t, last = self.tags, len(self.tags) - 1
+        a, b = t[i], t[j]
+        old = new = 0
+        if i > 0:
+            old += transition_score(t[i - 1], a)
+            new += transition_score(t[i - 1], b)
+        if j < last:
+            old += transition_score(b, t[j + 1])
+            new += transition_score(a, t[j + 1])
+        # When i and j are adjacent, the transition between them is unchanged
+        if j > i + 1:
+            old += transition_score(a, t[i + 1]) + transition_score(t[j - 1], b)
+            new += transition_score(b, t[i + 1]) + transition_score(t[j - 1], a)
+        return new - old
+
+    def delta_reverse(self, i, j):
+        if i > j:
+            i, j = j, i
+        t, last = self.tags, len(self.tags) - 1
+        old = new = 0
+        if i > 0:
+            old += transition_score(t[i - 1], t[i])
+            new += transition_score(t[i - 1], t[j])
+        if j < last:
+            old += transition_score(t[j], t[j + 1])
+            new += transition_score(t[i], t[j + 1])
+        return new - old
+
+    def _repaired(self, i, j, cross):
+        (a1, a2), (b1, b2) = self.slides[i], self.slides[j]
+        if cross:
+            return (a1, b2), (b1, a2)
+        return (a1, b1), (a2, b2)
+
+    def delta_repair(self, i, j, cross):
+        """Score change of re-pairing the vertical slides at positions i and j."""
+        if len(self.slides[i]) != 2 or len(self.slides[j]) != 2 or i == j:
+            return None
+        pt = self.photo_tags
+        si, sj = self._repaired(i, j, cross)
+        changes = {i: pt[si[0]] | pt[si[1]], j: pt[sj[0]] | pt[sj[1]]}
+        t, last = self.tags, len(self.tags) - 1
+        edges = {e for p in changes for e in (p - 1, p) if 0 <= e < last}
+        old = new = 0
+        for e in edges:
+            old += transition_score(t[e], t[e + 1])
+            new += transition_score(changes.get(e, t[e]), changes.get(e + 1, t[e + 1]))
+        return new - old
+
+    # ---------- Moves ---------- #
+    def swap(self, i, j, delta):
+        self.slides[i], self.slides[j] = self.slides[j], self.slides[i]
+        self.tags[i], self.tags[j] = self.tags[j], self.tags[i]
+        self.score += delta
+
+    def reverse(self, i, j, delta):
+        if i > j:
+            i, j = j, i
+        self.slides[i:j + 1] = self.slides[i:j + 1][::-1]
+        self.tags[i:j + 1] = self.tags[i:j + 1][::-1]
+        self.score += delta
+
+    def repair(self, i, j, cross, delta):
+        pt = self.photo_tags
+        self.slides[i], self.slides[j] = self._repaired(i, j, cross)
+        self.tags[i] = pt[self.slides[i][0]] | pt[self.slides[i][1]]
+        self.tags[j] = pt[self.slides[j][0]] | pt[self.slides[j][1]]
+        self.score += delta
+
+
+# ============================= Local search ============================= #
+class SearchStats:
+    def __init__(self):
+        self.tested   = 0
+        self.accepted = 0
+        self.gain     = 0
+        self.runtime  = 0.0
+
+
+def local_search(show, time_limit=60.0, max_moves=None, radius=1000, seed=0):
+    """
+    Random first-improvement hill climbing over swap / 2-opt / re-pairing moves.
+    Moves with a non-negative delta are applied, to walk over plateaus.
+    `radius` bounds the distance between the two positions of a move, so that
+    2-opt reversals stay cheap to apply.
+    """
+    rng   = random.Random(seed)
+    stats = SearchStats()
+    n     = len(show)
+    if n < 2:
+        return stats
+    has_pairs = any(len(s) == 2 for s in show.slides)
+    start     = time.perf_counter()
+    deadline  = start + time_limit
+
+    while max_moves is None or stats.tested < max_moves:
+        # Checking the clock every move would dominate the cost of a delta
+        if stats.tested % 4096 == 0 and time.perf_counter() > deadline:
+            break
+        stats.tested += 1
+        i = rng.randrange(n)
+        j = min(n - 1, i + rng.randint(1, radius)) if i < n - 1 else rng.randrange(n - 1)
+        move = rng.random()
+        if move < 0.45:
+            delta = show.delta_swap(i, j)
+            if delta >= 0:
+                show.swap(i, j, delta)
+        elif move < 0.9 or not has_pairs:
+            delta = show.delta_reverse(i, j)
+            if delta >= 0:
+                show.reverse(i, j, delta)
+        else:
+            cross = rng.random() < 0.5
+            delta = show.delta_repair(i, j, cross)
+            if delta is None:
+                continue
+            if delta >= 0:
+                show.repair(i, j, cross, delta)
+        if delta >= 0:
+            stats.accepted += 1
+            stats.gain     += delta
+
+    stats.runtime = time.perf_counter() - start
+    return stats
+
+
+# ============================= Validation ============================= #
+def read_submission(path):
+    with open(path, "r") as f:
+        lines = [line.split() for line in f if line.strip()]
+    if not lines or len(lines[0]) != 1:
+        raise ValueError(f"{path}: first line must hold the number of slides")
+    num_slides = int(lines[0][0])
+    if len(lines) - 1 != num_slides:
+        raise ValueError(f"{path}: announced {num_slides} slides, found {len(lines) - 1}")
+    return [tuple(int(p) for p in line) for line in lines[1:]]
+
+
+def validate_slides(instance, slides):
+    """Raise ValueError if `slides` is not a legal slideshow for `instance`."""
+    used = bytearray(instance.num_photos)
+    for k, slide in enumerate(slides):
+        for p in slide:
+            if not 0 <= p < instance.num_photos:
+                raise ValueError(f"slide {k}: photo {p} does not exist")
+            if used[p]:
+                raise ValueError(f"slide {k}: photo {p} is used twice")
+            used[p] = 1
+        kinds = [instance.vertical[p] for p in slide]
+        if kinds not in ([0], [1, 1]):
+            raise ValueError(f"slide {k}: must hold one H photo or two V photos, got {slide}")
+
+
+def validate_submission(instance, path):
+    """Check a submission file and return its slides and its score."""
+    slides = read_submission(path)
+    validate_slides(instance, slides)
+    return slides, Slideshow(instance, slides).score
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Score, validate and improve a slideshow")
+    parser.add_argument("instance", help="input file, e.g. project/PetPics-20.txt")
+    parser.add_argument("submission", nargs="?", help="submission to check (greedy solution if omitted)")
+    parser.add_argument("--improve", type=float, default=0, help="seconds of local search")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("-o", "--output", help="write the (improved) slideshow")
+    args = parser.parse_args()
+
+    if args.submission:
+        instance = read_instance(args.instance)
+        slides, score = validate_submission(instance, args.submission)
+        print(f"Submission valide, score = {score}")
+    else:
+        instance, greedy_slides, _, order = solve(args.instance)
+        slides = [greedy_slides[s] for s in order]
+
+    show = Slideshow(instance, slides)
+    if args.improve > 0:
+        stats = local_search(show, time_limit=args.improve, seed=args.seed)
+        print("===================================")
+        print(f"Mouvements testés \t= {stats.tested}")
+        print(f"Mouvements acceptés \t= {stats.accepted}")
+        print(f"Gain \t\t\t= {stats.gain}")
+        print(f"Mouvements / seconde \t= {stats.tested / max(stats.runtime, 1e-9):.0f}")
+        print("===================================")
+        assert show.score == show.full_score()
+        validate_slides(instance, show.slides)
+    print(f"Score = {show.score}")
+    if args.output:
+        write_submission(args.output, show.slides, range(len(show.slides)))
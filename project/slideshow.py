@@ -0,0 +1,202 @@
+import time
+import argparse
+
+# ============================= Explications ============================= #
+# Hash Code 2019 - Photo slideshow (see hashcode_2019_qualification_round.pdf).
+# Each photo is Horizontal (H) or Vertical (V) and carries a set of tags.
+# A slide holds either one H photo or two V photos, its tags being the union of
+# the photos' tags. The score of two consecutive slides A, B is
+#     min(|A ∩ B|, |A \ B|, |B \ A|)
+# and the score of the slideshow is the sum over all transitions.
+#
+# Tags are interned into integer ids while the file is streamed, so a slide is
+# a frozenset of ints. An inverted index tag -> slides lets the greedy
+# constructor only look at slides that share at least one tag with the current
+# one (any other slide scores 0), instead of scanning all the slides.
+
+# ============================= Instance ============================= #
+class Instance:
+    def __init__(self, name):
+        self.name     = name
+        self.vertical = bytearray()  # vertical[p] = 1 if photo p is V
+        self.tags     = []           # tags[p]     = tuple of tag ids of photo p
+        self.tag_ids  = {}           # tag name -> tag id
+
+    @property
+    def num_photos(self):
+        return len(self.tags)
+
+    @property
+    def num_tags(self):
+        return len(self.tag_ids)
+
+
+def read_instance(path):
+    """Stream a `project/*.txt` file, interning the tags into integer ids."""
+    instance = Instance(path)
+    tag_ids  = instance.tag_ids
+    with open(path, "r") as f:
+        num_photos = int(f.readline())
+        for p in range(num_photos):
+            fields = f.readline().split()
+            if not fields:
+                raise ValueError(f"{path}: expected {num_photos} photos, got {p}")
+            orientation, num_tags, names = fields[0], int(fields[1]), fields[2:]
+            if orientation not in ("H", "V") or len(names) != num_tags:
+                raise ValueError(f"{path}: malformed photo line {p}")
+            instance.vertical.append(orientation == "V")
+            # setdefault interns unseen names with the next free id
+            instance.tags.append(tuple(tag_ids.setdefault(t, len(tag_ids)) for t in names))
+    return instance
+
+
+# ============================= Slides ============================= #
+def pair_verticals(instance, window=100):
+    """
+    Pair the vertical photos two by two.
+    Photos are taken by decreasing number of tags and each one is matched with
+    the photo, among the next `window` unpaired ones, giving the largest union
+    of tags (i.e. the smallest overlap). Cost O(V * window).
+    """
+    tags      = instance.tags
+    verticals = [p for p in range(instance.num_photos) if instance.vertical[p]]
+    # Increasing order, so that the largest photos are popped from the end in O(1)
+    verticals.sort(key=lambda p: len(tags[p]))
+
+    pairs = []
+    while len(verticals) >= 2:
+        p      = verticals.pop()
+        p_tags = set(tags[p])
+        best_k, best_union = 0, -1
+        lo = max(0, len(verticals) - window)
+        for k in range(len(verticals) - 1, lo - 1, -1):
+            q     = verticals[k]
+            union = len(p_tags) + len(tags[q]) - len(p_tags.intersection(tags[q]))
+            if union > best_union:
+                best_k, best_union = k, union
+        pairs.append((p, verticals.pop(best_k)))
+    return pairs
+
+
+def build_slides(instance, window=100):
+    """Return the list of slides (tuples of photo ids) and their tag sets."""
+    verticals = instance.vertical
+    tags      = instance.tags
+    slides    = [(p,) for p in range(instance.num_photos) if not verticals[p]]
+    slides   += pair_verticals(instance, window=window)
+    slide_tags = [frozenset().union(*(tags[p] for p in s)) for s in slides]
+    return slides, slide_tags
+
+
+def transition_score(a, b):
+    common = len(a & b)
+    return min(common, len(a) - common, len(b) - common)
+
+
+def slideshow_score(slide_tags, order):
+    return sum(transition_score(slide_tags[i], slide_tags[j]) for i, j in zip(order, order[1:]))
+
+
+# ============================= Greedy ============================= #
+def build_index(slide_tags, num_tags):
+    """Inverted index: index[t] = list of the slides carrying tag t."""
+    index = [[] for _ in range(num_tags)]
+    for s, tags in enumerate(slide_tags):
+        for t in tags:
+            index[t].append(s)
+    return index
+
+
+def greedy_slideshow(slide_tags, num_tags, max_candidates=100):
+    """
+    Nearest neighbour construction: from the current slide, go to the unused
+    slide sharing tags with it that maximises the transition score. When no
+    unused slide shares a tag, jump to the next unused slide.
+    Each step scores at most `max_candidates` slides instead of all of them.
+    Used slides met while scanning a bucket of the index are removed from it,
+    so every entry of the index is dropped at most once over the whole run.
+    """
+    num_slides = len(slide_tags)
+    if num_slides == 0:
+        return []
+    index = build_index(slide_tags, num_tags)
+    used  = bytearray(num_slides)
+    seen  = [-1] * num_slides  # seen[s] = last step at which s was scored
+    order = [0]
+    used[0] = 1
+    next_free = 1  # every slide before next_free is used
+
+    for step in range(num_slides - 1):
+        current    = slide_tags[order[-1]]
+        size       = len(current)
+        best_bound = size // 2  # no transition can score more
+        best, best_score, scored = -1, -1, 0
+        for t in current:
+            bucket = index[t]
+            write = read = 0
+            while read < len(bucket) and scored < max_candidates:
+                s = bucket[read]
+                read += 1
+                if used[s]:
+                    continue
+                bucket[write] = s
+                write += 1
+                if seen[s] == step:
+                    continue
+                seen[s] = step
+                scored += 1
+                other  = slide_tags[s]
+                common = len(current & other)
+                score  = min(common, size - common, len(other) - common)
+                if score > best_score:
+                    best, best_score = s, score
+                    if score >= best_bound:
+                        scored = max_candidates
+            del bucket[write:read]
+            if scored >= max_candidates:
+                break
+        if best < 0:
+            while used[next_free]:
+                next_free += 1
+            best = next_free
+        used[best] = 1
+        order.append(best)
+    return order
+
+
+# ============================= Output ============================= #
+def write_submission(path, slides, order):
+    with open(path, "w") as f:
+        f.write(f"{len(order)}\n")
+        for s in order:
+            f.write(" ".join(map(str, slides[s])) + "\n")
+
+
+def solve(path, window=100, max_candidates=100):
+    instance = read_instance(path)
+    slides, slide_tags = build_slides(instance, window=window)
+    order = greedy_slideshow(slide_tags, instance.num_tags, max_candidates=max_candidates)
+    return instance, slides, slide_tags, order
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Greedy solver for the Hash Code 2019 slideshow")
+    parser.add_argument("instance", help="input file, e.g. project/PetPics-20.txt")
+    parser.add_argument("-o", "--output", help="submission file to write")
+    parser.add_argument("--window", type=int, default=100, help="vertical pairing window")
+    parser.add_argument("--max-candidates", type=int, default=100, help="candidates scored per step")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    instance, slides, slide_tags, order = solve(args.instance, args.window, args.max_candidates)
+    elapsed = time.perf_counter() - start
+
+    print("===================================")
+    print(f"Photos \t\t= {instance.num_photos}")
+    print(f"Tags \t\t= {instance.num_tags}")
+    print(f"Slides \t\t= {len(order)}")
+    print(f"Score \t\t= {slideshow_score(slide_tags, order)}")
+    print(f"Temps \t\t= {elapsed:.2f} seconds")
+    print("===================================")
+    if args.output:
+        write_submission(args.output, slides, order)
@@ -0,0 +1,187 @@
+import os
+import queue
+import argparse
+import multiprocessing as mp
+import numpy as np
+import gurobipy as gp
+from functools import partial
+from gurobipy import GRB
+from telemetry import mip_gap
+
+# ============================= Explications ============================= #
+# Racing solver: N processes solve the same MPS file, each with its own Env
+# and a different seed / parameter set (PARAM_SETS). They share incumbents:
+#   - at every new solution (MIPSOL) a worker that improves the shared best
+#     objective sends the solution to the inbox (a multiprocessing.Queue) of
+#     every other worker,
+#   - in the MIP callback a worker reads its inbox and hands the best incoming
+#     solution to its own search with cbSetSolution (the in-solve equivalent of
+#     a MIP start), when it beats its current incumbent.
+# The first worker whose gap reaches --target-gap sets the shared stop event,
+# every other worker terminates at its next MIP callback.
+#
+#   python race.py data/mkp.mps.bz2 --workers 4 --target-gap 1e-4
+
+PARAM_SETS = [
+    {},
+    {"MIPFocus": 1, "Heuristics": 0.2},
+    {"MIPFocus": 2, "Cuts": 2},
+    {"MIPFocus": 3},
+    {"Heuristics": 0.5, "Cuts": 0},
+    {"MIPFocus": 1, "Cuts": 1, "Presolve": 2},
+]
+
+
+class RaceData:
+    def __init__(self, worker, variables, inboxes, best, stop, winner, target_gap, sense):
+        self.worker     = worker
+        self.variables  = variables
+        self.inboxes    = inboxes     # one Queue per worker
+        self.best       = best        # shared best objective (mp.Value)
+        self.stop       = stop        # mp.Event, set by the winner
+        self.winner     = winner      # mp.Value, index of the winner (-1 before)
+        self.target_gap = target_gap
+        self.sense      = sense
+        self.sent       = 0
+        self.injected   = 0
+
+
+def claim_victory(cbdata):
+    with cbdata.winner.get_lock():
+        if cbdata.winner.value < 0:
+            cbdata.winner.value = cbdata.worker
+    cbdata.stop.set()
+
+
+def race_callback(model, where, *, cbdata):
+    if where == GRB.Callback.MIPSOL:
+        obj = model.cbGet(GRB.Callback.MIPSOL_OBJ)
+        with cbdata.best.get_lock():
+            if cbdata.sense * (obj - cbdata.best.value) >= 0:  # False while best is NaN
+                return
+            cbdata.best.value = obj
+        values = np.array(model.cbGetSolution(cbdata.variables))
+        for k, inbox in enumerate(cbdata.inboxes):
+            if k != cbdata.worker:
+                inbox.put((obj, values))
+        cbdata.sent += 1
+
+    elif where == GRB.Callback.MIP:
+        if cbdata.stop.is_set():
+            model.terminate()
+            return
+        best  = model.cbGet(GRB.Callback.MIP_OBJBST)
+        bound = model.cbGet(GRB.Callback.MIP_OBJBND)
+        if mip_gap(best, bound) <= cbdata.target_gap:
+            claim_victory(cbdata)
+            model.terminate()
+            return
+
+        # Best of the solutions received since the last call
+        incoming = None
+        while True:
+            try:
+                obj, values = cbdata.inboxes[cbdata.worker].get_nowait()
+            except queue.Empty:
+                break
+            if incoming is None or cbdata.sense * (obj - incoming[0]) < 0:
+                incoming = (obj, values)
+        if incoming is not None and cbdata.sense * (incoming[0] - best) < 0:
+            model.cbSetSolution(cbdata.variables, incoming[1].tolist())
+            cbdata.injected += 1
+
+
+def _race_worker(worker, path, params, target_gap, time_limit, inboxes, best, stop, winner, results):
+    # Solutions still unread at the end of the race are dropped instead of blocking the exit
+    for inbox in inboxes:
+        inbox.cancel_join_thread()
+    try:
+        with gp.Env(params={"OutputFlag": 0, "Threads": 1}) as env, gp.read(path, env=env) as model:
+            model.Params.Seed = worker
+            model.Params.TimeLimit = time_limit
+            model.Params.MIPGap = target_gap
+            for name, value in params.items():
+                model.setParam(name, value)
+            cbdata = RaceData(worker, model.getVars(), inboxes, best, stop, winner, target_gap, model.ModelSense)
+            model.optimize(partial(race_callback, cbdata=cbdata))
+
+            # Finished on its own: optimal within MIPGap = target_gap
+            if model.Status == GRB.OPTIMAL:
+                claim_victory(cbdata)
+            row = {
+                "worker":   worker,
+                "params":   params,
+                "status":   model.Status,
+                "obj":      model.ObjVal if model.SolCount else None,
+                "bound":    model.ObjBound,
+                "gap":      model.MIPGap if model.SolCount else None,
+                "runtime":  model.Runtime,
+                "work":     model.Work,
+                "sent":     cbdata.sent,
+                "injected": cbdata.injected,
+            }
+    except Exception as error:
+        # Bad file, licence or parameter: race() still gets one row per worker
+        row = error_row(worker, params, f"{type(error).__name__}: {error}")
+    results.put(row)
+
+
+def error_row(worker, params, message):
+    return {"worker": worker, "params": params, "status": "error", "error": message, "obj": None,
+            "bound": None, "gap": None, "runtime": 0.0, "work": 0.0, "sent": 0, "injected": 0}
+
+
+def race(path, workers=None, target_gap=1e-4, time_limit=600, param_sets=PARAM_SETS):
+    """
+    Race `workers` processes on the model file `path`. Return the index of the
+    winner (None if no worker reached `target_gap`) and the result of every worker.
+    """
+    workers = workers or os.cpu_count()
+    inboxes = [mp.Queue() for _ in range(workers)]
+    results = mp.Queue()
+    stop    = mp.Event()
+    winner  = mp.Value("i", -1)
+    best    = mp.Value("d", float("nan"))  # NaN until the first solution: every comparison fails
+
+    processes = [mp.Process(target=_race_worker,
+                            args=(w, path, param_sets[w % len(param_sets)], target_gap, time_limit,
+                                  inboxes, best, stop, winner, results))
+                 for w in range(workers)]
+    for p in processes:
+        p.start()
+    # Read the results before joining: a process exits only once its queues are flushed.
+    # A worker killed before its results.put (e.g. by a signal) gets an error row.
+    rows = {}
+    while len(rows) < workers:
+        try:
+            row = results.get(timeout=1.0)
+            rows[row["worker"]] = row
+        except queue.Empty:
+            for w, p in enumerate(processes):
+                if w not in rows and not p.is_alive() and p.exitcode != 0 and results.empty():
+                    rows[w] = error_row(w, param_sets[w % len(param_sets)], f"exit code {p.exitcode}")
+    rows = [rows[w] for w in sorted(rows)]
+    for p in processes:
+        p.join()
+    return (winner.value if winner.value >= 0 else None), rows
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Race several Gurobi processes on a model file")
+    parser.add_argument("model", nargs="?", default="data/mkp.mps.bz2")
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    parser.add_argument("--target-gap", type=float, default=1e-4)
+    parser.add_argument("--time-limit", type=float, default=600)
+    args = parser.parse_args()
+
+    winner, rows = race(args.model, args.workers, args.target_gap, args.time_limit)
+    for row in rows:
+        flag = "  <-- winner" if row["worker"] == winner else ""
+        if row["status"] == "error":
+            print(f"worker {row['worker']:2d} {str(row['params']):45s} error: {row['error']}")
+            continue
+        gap = f"{row['gap']:.4%}" if row["gap"] is not None else "-"
+        print(f"worker {row['worker']:2d} {str(row['params']):45s} obj = {row['obj']}  gap = {gap:>8}  "
+              f"{row['runtime']:8.2f} s  sent = {row['sent']:3d}  injected = {row['injected']:3d}{flag}")
+    if winner is None:
+        print(f"No worker reached the target gap {args.target_gap}")
@@ -0,0 +1,138 @@
+import numpy as np
+import pandas as pd
+import gurobipy as gp
+from pathlib import Path
+
+# ============================= Explications ============================= #
+# Bulk readout of a solved model, one attribute call per group of variables
+# (or of constraints) instead of one .X per element:
+#   - values(model, var, attr)      : NumPy array of `attr` for an MVar (same
+#     shape), a tupledict / dict / list of Var (in the order of its values), a Var
+#   - group_frame(model, var, attrs): DataFrame of the attributes, indexed by
+#     the keys of a tupledict (MultiIndex) or the positions of an MVar
+#   - extract(model, groups)        : {group: DataFrame} for the variables and
+#     the constraints. Without `groups` the variables and constraints are
+#     grouped by their name before "[" (x[3,5] -> x), for models read from a file.
+#   - write_frames(frames, path)    : one CSV or Parquet file per group, or all
+#     the columns in a single .npz
+# The reduced costs RC and the duals Pi exist only for continuous models;
+# the attributes that the model cannot give are left out of the frames.
+#
+#   frames = extract(model, {"x": x, "y": y}, attrs=("X", "RC"))
+#   write_frames(frames, "solution/", fmt="parquet")
+
+VAR_ATTRS    = ("X", "RC")
+CONSTR_ATTRS = ("Slack", "Pi")
+
+
+def _elements(var):
+    # Flat list of the Var of a container, for model.getAttr
+    if isinstance(var, gp.Var):
+        return [var]
+    if isinstance(var, dict):
+        return list(var.values())
+    return list(var)
+
+
+def values(model, var, attr="X"):
+    """Attribute `attr` of all the variables (or constraints) of `var` in one call."""
+    if isinstance(var, (gp.MVar, gp.MConstr)):
+        return np.asarray(var.getAttr(attr))
+    return np.asarray(model.getAttr(attr, _elements(var)))
+
+
+def _index(var, size):
+    if isinstance(var, dict):
+        keys = list(var.keys())
+        if keys and isinstance(keys[0], tuple):
+            return pd.MultiIndex.from_tuples(keys)
+        return pd.Index(keys)
+    if isinstance(var, (gp.MVar, gp.MConstr)) and len(var.shape) > 1:
+        return pd.MultiIndex.from_arrays([i.ravel() for i in np.indices(var.shape)])
+    return pd.RangeIndex(size)
+
+
+def _available(model, container, attrs):
+    # {attr: flat array} of the attributes the model can give
+    columns = {}
+    for attr in attrs:
+        try:
+            columns[attr] = values(model, container, attr).ravel()
+        except (gp.GurobiError, AttributeError):
+            continue
+    return columns
+
+
+def group_frame(model, var, attrs=VAR_ATTRS):
+    """DataFrame of the attributes of one group, indexed by its keys or positions."""
+    columns = _available(model, var, attrs)
+    size = len(next(iter(columns.values()))) if columns else 0
+    return pd.DataFrame(columns, index=_index(var, size))
+
+
+def groups_by_name(names):
+    """{prefix: (positions, index)} with the names "prefix[index]" grouped by prefix."""
+    groups = {}
+    for position, name in enumerate(names):
+        prefix, _, index = name.partition("[")
+        members = groups.setdefault(prefix, ([], []))
+        members[0].append(position)
+        members[1].append(index.rstrip("]"))
+    return groups
+
+
+def extract(model, groups=None, constraints=None, attrs=VAR_ATTRS, constr_attrs=CONSTR_ATTRS):
+    """
+    {group: DataFrame} of the variable groups and of the constraint groups
+    (the latter prefixed "constr:" when both have the same name). `groups` and
+    `constraints` map a name to a container; when None, the model is grouped
+    by names.
+    """
+    frames = {}
+    for kind, given, get, name_attr, kind_attrs in (
+            ("var",    groups,      model.getVars,   "VarName",    attrs),
+            ("constr", constraints, model.getConstrs, "ConstrName", constr_attrs)):
+        if not kind_attrs:
+            continue
+        if given is None:
+            elements = get()
+            named = groups_by_name(model.getAttr(name_attr, elements))
+            columns = _available(model, elements, kind_attrs)
+            for prefix, (position, index) in named.items():
+                frame = pd.DataFrame({attr: column[position] for attr, column in columns.items()},
+                                     index=pd.Index(index, name="index"))
+                frames[_unique(frames, prefix, kind)] = frame
+        else:
+            for name, container in given.items():
+                frames[_unique(frames, name, kind)] = group_frame(model, container, kind_attrs)
+    return frames
+
+
+def _unique(frames, name, kind):
+    return name if name not in frames else f"{kind}:{name}"
+
+
+def write_frames(frames, path, fmt="csv"):
+    """
+    Write the frames of extract(): `path` is a directory with one
+    <group>.csv / <group>.parquet per group, or a .npz file with the columns
+    "<group>/<attr>". Parquet needs pyarrow or fastparquet.
+    """
+    path = Path(path)
+    if path.suffix == ".npz":
+        np.savez(path, **{f"{name}/{attr}": frame[attr].to_numpy()
+                          for name, frame in frames.items() for attr in frame.columns})
+        return [path]
+    path.mkdir(parents=True, exist_ok=True)
+    written = []
+    for name, frame in frames.items():
+        target = path / f"{name.replace(':', '_')}.{fmt}"
+        if fmt == "csv":
+            frame.to_csv(target)
+        elif fmt == "parquet":
+            # Parquet needs string column names and a flat index
+            frame.reset_index().rename(columns=str).to_parquet(target, index=False)
+        else:
+            raise ValueError(f"Unknown format: {fmt}")
+        written.append(target)
+    return written
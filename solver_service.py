@@ -0,0 +1,353 @@
+import os
+import json
+import time
+import asyncio
+import argparse
+import importlib
+import itertools
+import numbers
+import numpy as np
+import gurobipy as gp
+import multiprocessing as mp
+from gurobipy import GRB
+
+# ============================= Explications ============================= #
+# Long-running local solver service. Each script opens a gp.Env(), solves
+# once and exits, so every job pays the interpreter start, the imports and the
+# licence check again. Here worker processes keep one Env each (the _env +
+# _init_worker pattern of project/lns.py), and an asyncio server feeds them
+# through a priority queue. Each worker is a process of its own behind a
+# pipe, so that a job which overruns its time limit (plus a grace delay for
+# the build) can be stopped: the worker is killed and restarted, the job
+# answered "timeout", and the next job by priority gets a free worker.
+#
+# Protocol: one JSON object per line, over a Unix socket (--socket) or
+# localhost (--port). A job is
+#   {"id": 1, "model": "knapsack", "generate": {"num_items": 100, "seed": 3},
+#    "priority": 0, "time_limit": 5, "values": false}
+# with exactly one source of data:
+#   - "generate": keyword arguments of the generator of the model (MODELS)
+#   - "path"    : a data file of the loader, or the .mps / .lp file for "mps"
+#   - "data"    : positional arguments of the builder, lists turned into arrays
+# and optional "options" for the builder (e.g. {"formulation": "linking"}).
+# The smallest priority is served first, ties in order of arrival. The time
+# limit of a job is capped by --max-time-limit. An invalid job (not an object,
+# unknown model, non-numeric priority or time limit) is answered with
+# status "error". The answer, one line too, is
+#   {"id": 1, "status": 2, "objective": ..., "bound": ..., "runtime": ..., "values": {name: x}}
+# ("values" only when asked for; the nonzero values by variable name).
+# Answers are written as the jobs end, not in the order of the requests.
+#
+#   python solver_service.py serve --socket /tmp/gurobi.sock --workers 4
+#   python solver_service.py bench --jobs 200 --workers 4
+
+# model: (module, generator, loader, builder)
+MODELS = {
+    "knapsack":   ("3_Knapsack",        "generate_knapsack",   None,                 "build_knapsack_matrix"),
+    "portfolio":  ("4_portfolio",       "generate_portfolio",  "load_portfolio",     "build_portfolio"),
+    "lot_sizing": ("5_lot_sizing",      "generate_lot_sizing", "load_lot_sizing",    "build_lot_sizing_matrix"),
+    "commitment": ("9_commitment_API",  "generate_commitment", None,                 "build_commitment"),
+}
+
+
+# ============================= Worker ============================= #
+_env = None
+
+
+def _init_worker(threads):
+    # One Env per worker process, kept for all its jobs
+    global _env
+    if _env is None:
+        _env = gp.Env(params={"OutputFlag": 0, "Threads": threads})
+
+
+def _worker_loop(conn, threads):
+    _init_worker(threads)
+    while True:
+        try:
+            job = conn.recv()
+        except EOFError:
+            break
+        if job is None:
+            break
+        conn.send(run_job(job))
+
+
+def _builder_arguments(job):
+    module, generator, loader, builder = MODELS[job["model"]]
+    module = importlib.import_module(module)
+    if "generate" in job:
+        args = getattr(module, generator)(**job["generate"])
+    elif "path" in job:
+        if loader is None:
+            raise ValueError(f"No loader for the model {job['model']}")
+        args = getattr(module, loader)(job["path"])
+    elif "data" in job:
+        args = [np.asarray(a, dtype=float) if isinstance(a, list) else a for a in job["data"]]
+    else:
+        raise ValueError("The job needs one of 'generate', 'path' or 'data'")
+    if job["model"] == "lot_sizing":
+        args = args[1:]  # the name of the instance is not an argument of the builder
+    return getattr(module, builder), args
+
+
+def run_job(job):
+    """Build and solve one job with the Env of the worker, return the answer dict."""
+    start = time.perf_counter()
+    try:
+        if job["model"] == "mps":
+            model = gp.read(job["path"], env=_env)
+        else:
+            build, args = _builder_arguments(job)
+            model = gp.Model(job["model"], env=_env)
+            build(model, *args, **job.get("options", {}))
+        with model:
+            model.Params.TimeLimit = job["time_limit"]
+            model.optimize()
+            answer = {"id": job.get("id"), "status": model.Status, "runtime": model.Runtime,
+                      "objective": model.ObjVal if model.SolCount else None,
+                      "bound": model.ObjBound if model.IsMIP else (model.ObjVal if model.SolCount else None)}
+            if job.get("values") and model.SolCount:
+                names  = model.getAttr("VarName", model.getVars())
+                values = np.array(model.getAttr("X", model.getVars()))
+                nonzero = np.flatnonzero(np.abs(values) > 1e-9)
+                answer["values"] = {names[i]: float(values[i]) for i in nonzero}
+    except Exception as error:  # any failure of the job is its answer, the worker keeps serving
+        answer = {"id": job.get("id"), "status": "error", "error": f"{type(error).__name__}: {error}"}
+    answer["elapsed"] = time.perf_counter() - start
+    return answer
+
+
+# ============================= Service ============================= #
+def validate_job(job, max_time_limit):
+    """Checked copy of the job, time limit capped; ValueError when invalid."""
+    if not isinstance(job, dict):
+        raise ValueError(f"A job is a JSON object, got {type(job).__name__}")
+    if job.get("model") != "mps" and job.get("model") not in MODELS:
+        raise ValueError(f"Unknown model: {job.get('model')!r}")
+    for key in ("priority", "time_limit"):
+        value = job.get(key, 0)
+        if isinstance(value, bool) or not isinstance(value, numbers.Real) or not np.isfinite(value):
+            raise ValueError(f"'{key}' must be a number, got {value!r}")
+    time_limit = float(job.get("time_limit", max_time_limit))
+    if time_limit < 0:
+        raise ValueError(f"'time_limit' must be nonnegative, got {time_limit}")
+    return {**job, "priority": job.get("priority", 0), "time_limit": min(time_limit, max_time_limit)}
+
+
+def _error(job, message):
+    return {"id": job.get("id") if isinstance(job, dict) else None, "status": "error", "error": message}
+
+
+class Worker:
+    """One process with its Env behind a pipe, restarted when a job overruns."""
+
+    def __init__(self, threads):
+        self.threads = threads
+        self._start()
+
+    def _start(self):
+        self.conn, child = mp.Pipe()
+        self.process = mp.Process(target=_worker_loop, args=(child, self.threads), daemon=True)
+        self.process.start()
+        child.close()
+
+    def _call(self, job):
+        self.conn.send(job)
+        return self.conn.recv()
+
+    async def run(self, job, timeout):
+        # The pipe is read in a thread; on timeout the kill ends that read with EOFError
+        call = asyncio.get_running_loop().run_in_executor(None, self._call, job)
+        try:
+            return await asyncio.wait_for(call, timeout)
+        except asyncio.TimeoutError:
+            self.restart()
+            raise
+
+    def restart(self):
+        self.process.kill()
+        self.process.join()
+        self.conn.close()
+        self._start()
+
+    def close(self):
+        try:
+            self.conn.send(None)
+        except OSError:
+            pass
+        self.process.join(timeout=5)
+        if self.process.is_alive():
+            self.process.kill()
+            self.process.join()
+        self.conn.close()
+
+
+class SolverService:
+    """Priority queue of jobs in front of `workers` processes with one Env each."""
+
+    def __init__(self, workers=os.cpu_count(), threads=1, max_time_limit=600, grace=30):
+        self.workers        = workers
+        self.threads        = threads
+        self.max_time_limit = max_time_limit
+        self.grace          = grace
+        self.queue   = asyncio.PriorityQueue()
+        self.counter = itertools.count()  # order of arrival, ties of the priorities
+        self.pool    = []
+        self.tasks   = []
+
+    async def start(self):
+        self.pool  = [Worker(self.threads) for _ in range(self.workers)]
+        # One dispatcher per worker: a job leaves the queue only when a worker is free
+        self.tasks = [asyncio.create_task(self._dispatch(worker)) for worker in self.pool]
+
+    async def stop(self):
+        for task in self.tasks:
+            task.cancel()
+        await asyncio.gather(*self.tasks, return_exceptions=True)
+        for worker in self.pool:
+            worker.close()
+
+    async def submit(self, job):
+        """Queue the job and wait for its answer. ValueError if the job is invalid."""
+        job = validate_job(job, self.max_time_limit)
+        future = asyncio.get_running_loop().create_future()
+        await self.queue.put((job["priority"], next(self.counter), job, future))
+        return await future
+
+    async def _dispatch(self, worker):
+        while True:
+            _, _, job, future = await self.queue.get()
+            try:
+                # Gurobi stops at the time limit; the extra delay covers the build
+                answer = await worker.run(job, job["time_limit"] + self.grace)
+            except asyncio.TimeoutError:
+                answer = {"id": job.get("id"), "status": "timeout"}
+            except Exception as error:  # the worker died: report it, restart it, keep the service up
+                answer = _error(job, f"{type(error).__name__}: {error}")
+                worker.restart()
+            if not future.cancelled():
+                future.set_result(answer)
+            self.queue.task_done()
+
+    async def _answer(self, job, writer, lock):
+        try:
+            answer = await self.submit(job)
+        except Exception as error:
+            answer = _error(job, f"{type(error).__name__}: {error}")
+        await self._reply(writer, lock, answer)
+
+    @staticmethod
+    async def _reply(writer, lock, answer):
+        # One JSON line per answer, the lock keeps the lines of concurrent jobs whole
+        async with lock:
+            writer.write((json.dumps(answer) + "\n").encode())
+            await writer.drain()
+
+    async def handle(self, reader, writer):
+        # The jobs of a connection run concurrently, each answer is sent when ready
+        lock, pending = asyncio.Lock(), set()
+        try:
+            while line := await reader.readline():
+                try:
+                    job = json.loads(line)
+                except json.JSONDecodeError as error:
+                    await self._reply(writer, lock, _error(None, f"JSONDecodeError: {error}"))
+                    continue
+                task = asyncio.create_task(self._answer(job, writer, lock))
+                pending.add(task)
+                task.add_done_callback(pending.discard)
+            await asyncio.gather(*pending)
+        finally:
+            writer.close()
+
+    async def serve(self, socket=None, host="127.0.0.1", port=None):
+        await self.start()
+        if socket:
+            server = await asyncio.start_unix_server(self.handle, path=socket)
+        else:
+            server = await asyncio.start_server(self.handle, host=host, port=port)
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            await self.stop()
+
+
+# ============================= Client ============================= #
+async def submit_jobs(jobs, socket=None, host="127.0.0.1", port=None):
+    """Send the jobs on one connection, return the answers in the order of `jobs`."""
+    if socket:
+        reader, writer = await asyncio.open_unix_connection(socket)
+    else:
+        reader, writer = await asyncio.open_connection(host, port)
+    jobs = [{**job, "id": job.get("id", i)} for i, job in enumerate(jobs)]
+    for job in jobs:
+        writer.write((json.dumps(job) + "\n").encode())
+    await writer.drain()
+    answers = {}
+    while len(answers) < len(jobs):
+        answer = json.loads(await reader.readline())
+        answers[answer.get("id")] = answer
+    writer.close()
+    await writer.wait_closed()
+    return [answers[job["id"]] for job in jobs]
+
+
+def solve(job, socket=None, host="127.0.0.1", port=None):
+    """Blocking helper for the scripts: one job, one answer."""
+    return asyncio.run(submit_jobs([job], socket=socket, host=host, port=port))[0]
+
+
+def _bench_jobs(num_jobs, size):
+    return [{"model": "knapsack", "generate": {"num_items": size, "seed": i}, "time_limit": 10}
+            for i in range(num_jobs)]
+
+
+async def _bench(args):
+    jobs = _bench_jobs(args.jobs, args.size)
+    service = SolverService(workers=args.workers, max_time_limit=args.max_time_limit)
+    await service.start()
+    try:
+        # One job per worker first, for the imports of the builders
+        await asyncio.gather(*(service.submit(job) for job in jobs[:args.workers]))
+        start = time.perf_counter()
+        answers = await asyncio.gather(*(service.submit(job) for job in jobs))
+        elapsed = time.perf_counter() - start
+    finally:
+        await service.stop()
+    return answers, elapsed
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Local Gurobi solver service")
+    parser.add_argument("command", choices=["serve", "bench"])
+    parser.add_argument("--socket", help="Unix socket path (default: localhost --port)")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    parser.add_argument("--threads", type=int, default=1, help="Gurobi threads of each worker")
+    parser.add_argument("--max-time-limit", type=float, default=600)
+    parser.add_argument("--jobs", type=int, default=200, help="bench: number of knapsack jobs")
+    parser.add_argument("--size", type=int, default=50, help="bench: items of each knapsack")
+    args = parser.parse_args()
+
+    if args.command == "serve":
+        service = SolverService(workers=args.workers, threads=args.threads, max_time_limit=args.max_time_limit)
+        try:
+            asyncio.run(service.serve(socket=args.socket, port=None if args.socket else args.port))
+        except KeyboardInterrupt:
+            pass
+    else:
+        answers, elapsed = asyncio.run(_bench(args))
+        failed = sum(answer["status"] != GRB.OPTIMAL for answer in answers)
+        print(f"service   : {args.jobs} jobs in {elapsed:8.2f} s ({args.jobs / elapsed:8.1f} jobs/s), {failed} not optimal")
+
+        # Baseline: a new Env for every job, as the scripts do (interpreter start not counted)
+        knapsack = importlib.import_module("3_Knapsack")
+        start = time.perf_counter()
+        for job in _bench_jobs(args.jobs, args.size):
+            with gp.Env(params={"OutputFlag": 0, "Threads": args.threads}) as env, gp.Model(env=env) as model:
+                knapsack.build_knapsack_matrix(model, *knapsack.generate_knapsack(**job["generate"]))
+                model.optimize()
+        elapsed = time.perf_counter() - start
+        print(f"fresh Env : {args.jobs} jobs in {elapsed:8.2f} s ({args.jobs / elapsed:8.1f} jobs/s)")
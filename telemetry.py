@@ -0,0 +1,178 @@
+import csv
+import json
+from collections import deque, namedtuple
+from functools import partial
+from pathlib import Path
+from gurobipy import GRB
+
+# ============================= Explications ============================= #
+# Progress recorder of a MIP solve, attached with a callback to any model:
+#
+#   recorder = ProgressRecorder(interval=0.5, policies=[GapPlateau(15, 1e-4)], path="run.jsonl")
+#   model.optimize(recorder.attach(model))
+#   recorder.flush()
+#
+# A sample (runtime, work, event, incumbent, bound, gap, nodes) is taken
+# every `interval` seconds of solver runtime from the MIP callback, and at
+# every new incumbent (MIPSOL). Between two samples the callback only reads
+# RUNTIME, so the overhead stays negligible. The samples go into a ring
+# buffer of `capacity` entries: with a `path` it is flushed there when full
+# (JSON lines, or CSV for a .csv path), without one only the last samples are kept.
+#
+# Stopping rules are policies, callables sample -> bool evaluated on every
+# sample; the first one returning True terminates the solve:
+#   - GapPlateau   : the gap has not improved for some time (rule of 7_termination.py)
+#   - TimeToTarget : the gap or the incumbent reached a target
+#   - WorkLimit    : a deterministic budget of work units
+
+FIELDS = ("time", "work", "event", "incumbent", "bound", "gap", "nodes")
+Sample = namedtuple("Sample", FIELDS)
+
+
+def mip_gap(best, bound):
+    # Same definition as the MIPGap attribute, infinite without incumbent
+    if abs(best) >= GRB.INFINITY or abs(bound) >= GRB.INFINITY:
+        return float("inf")
+    if best == 0:
+        return 0.0 if bound == 0 else float("inf")
+    return abs(bound - best) / abs(best)
+
+
+# ----- Stopping policies -----
+class GapPlateau:
+    """Stop when the gap has not decreased by more than `epsilon` for `patience` seconds."""
+    def __init__(self, patience=15, epsilon=1e-4, verbose=False):
+        self.patience = patience
+        self.epsilon = epsilon
+        self.verbose = verbose
+        self.last_gap = GRB.INFINITY
+        self.last_gap_change_time = -GRB.INFINITY
+
+    def __call__(self, sample):
+        if sample.gap == float("inf"):
+            return False
+        if sample.gap < self.last_gap - self.epsilon:
+            if self.verbose:
+                print("Meilleur résultat significatif de trouvé : ")
+                print(f"gap = {sample.gap} %,\t temps = {sample.time} seconds")
+            self.last_gap_change_time = sample.time
+            self.last_gap = sample.gap
+            return False
+        return sample.time - self.last_gap_change_time > self.patience
+
+
+class TimeToTarget:
+    """
+    Stop once the gap is below `gap` or the incumbent is at least as good as
+    `objective`. `sense` defaults to the ModelSense of the model the recorder
+    is attached to.
+    """
+    def __init__(self, gap=None, objective=None, sense=None):
+        self.gap = gap
+        self.objective = objective
+        self.sense = sense
+        self.reached_at = None  # (runtime, work) when the target was reached
+
+    def __call__(self, sample):
+        reached = self.gap is not None and sample.gap <= self.gap
+        if self.objective is not None and abs(sample.incumbent) < GRB.INFINITY:
+            reached |= self.sense * (sample.incumbent - self.objective) <= 0
+        if reached and self.reached_at is None:
+            self.reached_at = (sample.time, sample.work)
+        return reached
+
+
+class WorkLimit:
+    """Stop after `work` work units, a deterministic alternative to a time limit."""
+    def __init__(self, work):
+        self.work = work
+
+    def __call__(self, sample):
+        return sample.work >= self.work
+
+
+# ----- Recorder -----
+class ProgressRecorder:
+    def __init__(self, interval=1.0, capacity=10000, policies=(), path=None):
+        self.interval = interval             # seconds of solver runtime between two samples
+        self.buffer = deque(maxlen=capacity) # ring buffer of Sample
+        self.policies = list(policies)
+        self.path = Path(path) if path is not None else None
+        self.sense = GRB.MINIMIZE
+        self.next_sample = 0.0
+        self.num_samples = 0
+        self.stopped_by = None               # policy which terminated the solve
+
+    def attach(self, model):
+        """Callback to pass to model.optimize()."""
+        model.update()
+        self.sense = model.ModelSense
+        self.next_sample = 0.0
+        for policy in self.policies:
+            # Policies comparing objectives follow the sense of the model unless given one
+            if isinstance(policy, TimeToTarget) and policy.sense is None:
+                policy.sense = self.sense
+        return partial(progress_callback, cbdata=self)
+
+    def record(self, sample):
+        if self.path is not None and len(self.buffer) == self.buffer.maxlen:
+            self.flush()
+        self.buffer.append(sample)
+        self.num_samples += 1
+
+    def flush(self, path=None):
+        """Append the buffered samples to `path` (JSON lines, or CSV for .csv) and empty the buffer."""
+        path = Path(path) if path is not None else self.path
+        if path is None:
+            raise ValueError("No path to flush the samples to")
+        if path.suffix == ".csv":
+            new_file = not path.exists() or path.stat().st_size == 0
+            with open(path, "a", newline="") as f:
+                writer = csv.writer(f)
+                if new_file:
+                    writer.writerow(FIELDS)
+                writer.writerows(self.buffer)
+        else:
+            with open(path, "a") as f:
+                for sample in self.buffer:
+                    # null rather than the non-standard Infinity of json.dumps
+                    row = sample._asdict()
+                    if row["gap"] == float("inf"):
+                        row["gap"] = None
+                    f.write(json.dumps(row) + "\n")
+        self.buffer.clear()
+
+    def samples(self):
+        return list(self.buffer)
+
+
+def progress_callback(model, where, *, cbdata):
+    if where == GRB.Callback.MIP:
+        runtime = model.cbGet(GRB.Callback.RUNTIME)
+        if runtime < cbdata.next_sample:
+            return
+        event = "progress"
+        best  = model.cbGet(GRB.Callback.MIP_OBJBST)
+        bound = model.cbGet(GRB.Callback.MIP_OBJBND)
+        nodes = model.cbGet(GRB.Callback.MIP_NODCNT)
+        cbdata.next_sample = runtime + cbdata.interval
+    elif where == GRB.Callback.MIPSOL:
+        runtime = model.cbGet(GRB.Callback.RUNTIME)
+        event = "incumbent"
+        # MIPSOL_OBJBST may not include the new solution yet
+        best  = model.cbGet(GRB.Callback.MIPSOL_OBJBST)
+        obj   = model.cbGet(GRB.Callback.MIPSOL_OBJ)
+        if cbdata.sense * (obj - best) < 0:
+            best = obj
+        bound = model.cbGet(GRB.Callback.MIPSOL_OBJBND)
+        nodes = model.cbGet(GRB.Callback.MIPSOL_NODCNT)
+    else:
+        return
+
+    sample = Sample(runtime, model.cbGet(GRB.Callback.WORK), event, best, bound, mip_gap(best, bound), nodes)
+    cbdata.record(sample)
+    for policy in cbdata.policies:
+        if policy(sample):
+            cbdata.stopped_by = type(policy).__name__
+            model.terminate()
+            return